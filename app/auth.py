@@ -1,8 +1,8 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from . import schemas
+from .hashing import pwd_context, hasher
 import os
 from dotenv import load_dotenv
 
@@ -13,14 +13,20 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
+# Versiones síncronas (scripts y tareas fuera del event loop)
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# Versiones asíncronas para los endpoints: bcrypt corre en el pool de hashing
+async def verify_password_async(plain_password, hashed_password):
+    return await hasher.verify(plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await hasher.hash(password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -1,37 +1,91 @@
-from .database import SessionLocal
-from fastapi import Depends, HTTPException, status
+from dataclasses import dataclass
+from .database import AsyncSessionLocal
+from fastapi import Cookie, Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
-from . import auth, models, schemas
-from sqlalchemy.orm import Session
+from . import auth, models, pubsub, schemas
+from .cache import TTLCache
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+import os
 
-# Dependencia para obtener la sesión de BD
-def get_db():
-    db = SessionLocal()
-    try:
+# Dependencia para obtener la sesión asíncrona de BD
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 # Esquema de autenticación OAuth2
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+oauth2_scheme_opcional = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
 
-# Obtener usuario actual a partir del token
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+# Instantánea inmutable del usuario autenticado (lo único que necesitan los permisos)
+@dataclass(frozen=True, slots=True)
+class Principal:
+    id_usuario: int
+    email: str
+    rol: models.RolEnum
+    activo: bool
+
+# Caché de principals por "sub" del JWT (email)
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", 60))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 1024))
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+# Invalidar tras modificar o borrar un usuario (llamar después del commit)
+def invalidate_principal(*emails: str):
+    for email in emails:
+        principal_cache.invalidate(email)
+
+# El mismo cambio llega a los demás workers por app/pubsub.py
+USUARIO_MODIFICADO = "usuario.modificado"
+
+@pubsub.al_recibir(USUARIO_MODIFICADO)
+def _usuario_modificado(mensaje: pubsub.Mensaje):
+    invalidate_principal(*mensaje.datos["emails"])
+
+pubsub.al_recargar(principal_cache.clear)
+
+# Principal del token: caché por email y, si falla, una consulta de las columnas que usan los permisos
+async def principal_from_token(token: Optional[str], db: AsyncSession) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudieron validar las credenciales",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    token_data = auth.verify_token(token, credentials_exception)
-    user = db.query(models.Usuario).filter(models.Usuario.email == token_data.email).first()
-    if user is None:
+    if not token:
         raise credentials_exception
-    if not user.activo:
+    token_data = auth.verify_token(token, credentials_exception)
+    principal = principal_cache.get(token_data.email)
+    if principal is None:
+        result = await db.execute(
+            select(models.Usuario.id_usuario, models.Usuario.email, models.Usuario.rol, models.Usuario.activo)
+            .where(models.Usuario.email == token_data.email)
+        )
+        row = result.first()
+        if row is None:
+            raise credentials_exception
+        principal = Principal(id_usuario=row.id_usuario, email=row.email, rol=row.rol, activo=bool(row.activo))
+        principal_cache.set(token_data.email, principal)
+    if not principal.activo:
         raise HTTPException(status_code=400, detail="Usuario inactivo")
-    return user
+    return principal
+
+# Obtener usuario actual a partir del token
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+    return await principal_from_token(token, db)
+
+# Lo mismo para los streams SSE: EventSource no puede enviar la cabecera Authorization, así que
+# el token también se acepta en ?access_token= o en la cookie access_token (la cabecera tiene prioridad).
+# En la query string el token acaba en los logs de acceso del proxy: mejor la cookie si se puede.
+async def get_current_user_sse(token: Optional[str] = Depends(oauth2_scheme_opcional),
+                               access_token: Optional[str] = Query(None, description="Token JWT, para clientes EventSource"),
+                               access_token_cookie: Optional[str] = Cookie(None, alias="access_token",
+                                                                           description="Token JWT, para clientes EventSource"),
+                               db: AsyncSession = Depends(get_db)):
+    return await principal_from_token(token or access_token or access_token_cookie, db)
 
-# Dependencia para verificar si el usuario es administrador
-async def get_current_admin(current_user: models.Usuario = Depends(get_current_user)):
+# Dependencia para verificar si el usuario es administrador (decide con el rol cacheado)
+async def get_current_admin(current_user: Principal = Depends(get_current_user)):
     if current_user.rol != models.RolEnum.admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tienes permisos de administrador")
-    return current_user
\ No newline at end of file
+    return current_user
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import os
+import secrets
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, Optional
+from . import models, pubsub
+
+# Eventos recientes que se pueden reenviar a un cliente que reconecta con Last-Event-ID
+EVENTS_BUFFER_SIZE = int(os.getenv("EVENTS_BUFFER_SIZE", 1000))
+# Eventos pendientes por suscriptor; si se llena, se le desconecta y reanuda desde el buffer
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", 256))
+# Segundos sin eventos tras los que se envía un comentario para mantener viva la conexión
+EVENTS_KEEPALIVE = float(os.getenv("EVENTS_KEEPALIVE", 15))
+
+# Tipos de evento
+PEDIDO_CREADO = "pedido.creado"
+PEDIDO_DETALLES_AGREGADOS = "pedido.detalles_agregados"
+PEDIDO_CERRADO = "pedido.cerrado"
+PEDIDO_CANCELADO = "pedido.cancelado"
+PAGO_REGISTRADO = "pago.registrado"
+MESA_ACTUALIZADA = "mesa.actualizada"
+TIPOS = (PEDIDO_CREADO, PEDIDO_DETALLES_AGREGADOS, PEDIDO_CERRADO, PEDIDO_CANCELADO, PAGO_REGISTRADO, MESA_ACTUALIZADA)
+# El cliente debe recargar su estado completo; no se puede filtrar, llega a todos los suscriptores
+RESET = "reset"
+
+@dataclass(frozen=True, slots=True)
+class Evento:
+    id: str
+    tipo: str
+    id_usuario: Optional[int]  # dueño del pedido; None = visible para todos (mesas)
+    categorias: frozenset  # categorías de las líneas que trae el evento; vacío = no filtrable
+    sse: str  # mensaje ya formateado: se serializa una vez por evento, no por suscriptor
+
+@dataclass(eq=False)
+class Suscriptor:
+    rol: models.RolEnum
+    id_usuario: int
+    tipos: Optional[frozenset] = None
+    categorias: Optional[frozenset] = None
+    solo_usuario: Optional[int] = None
+    cola: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(EVENTS_QUEUE_SIZE))
+
+    def acepta(self, evento: Evento) -> bool:
+        if evento.tipo == RESET:
+            return True
+        if self.tipos is not None and evento.tipo not in self.tipos:
+            return False
+        if evento.id_usuario is not None:
+            # Igual que GET /pedidos: un empleado solo ve los eventos de sus pedidos
+            if self.rol != models.RolEnum.admin and evento.id_usuario != self.id_usuario:
+                return False
+            if self.solo_usuario is not None and evento.id_usuario != self.solo_usuario:
+                return False
+        if self.categorias is not None and evento.categorias and not (evento.categorias & self.categorias):
+            return False
+        return True
+
+def _valor(v):
+    if isinstance(v, datetime):
+        return v.isoformat()
+    return getattr(v, "value", v)
+
+def formatear(id_evento: str, tipo: str, datos) -> str:
+    cuerpo = json.dumps(datos, ensure_ascii=False, separators=(",", ":"), default=_valor)
+    return f"id: {id_evento}\nevent: {tipo}\ndata: {cuerpo}\n\n"
+
+class Broadcaster:
+    """Reparte los eventos del proceso a los streams SSE abiertos.
+
+    Cada suscriptor tiene su propia cola acotada: uno lento no frena a los demás ni hace crecer la
+    memoria. Los ids llevan un prefijo por arranque del proceso, así un Last-Event-ID de otro
+    arranque (o demasiado antiguo para el buffer) se detecta y el cliente recibe un "reset".
+    """
+
+    def __init__(self, buffer_size: int = EVENTS_BUFFER_SIZE):
+        self.arranque = secrets.token_hex(4)
+        self.secuencia = 0
+        self.buffer: deque = deque(maxlen=buffer_size)
+        self.suscriptores: set = set()
+        self.publicados = 0
+        self.desconectados = 0
+
+    def publicar(self, tipo: str, datos, id_usuario: Optional[int] = None, categorias: Iterable = ()) -> Evento:
+        self.secuencia += 1
+        id_evento = f"{self.arranque}-{self.secuencia}"
+        evento = Evento(id_evento, tipo, id_usuario, frozenset(c for c in categorias if c),
+                        formatear(id_evento, tipo, datos))
+        self.buffer.append(evento)
+        self.publicados += 1
+        for suscriptor in list(self.suscriptores):
+            if suscriptor.acepta(evento):
+                self._entregar(suscriptor, evento)
+        return evento
+
+    def _entregar(self, suscriptor: Suscriptor, evento: Evento):
+        try:
+            suscriptor.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Cliente lento: se vacía su cola y se cierra su stream; al reconectar con su
+            # Last-Event-ID recupera lo perdido del buffer
+            self.suscriptores.discard(suscriptor)
+            self.desconectados += 1
+            while not suscriptor.cola.empty():
+                suscriptor.cola.get_nowait()
+            suscriptor.cola.put_nowait(None)
+
+    # Eventos posteriores a last_event_id que el suscriptor acepta; None si no se puede reanudar
+    def pendientes(self, suscriptor: Suscriptor, last_event_id: str) -> Optional[list]:
+        arranque, _, secuencia = last_event_id.rpartition("-")
+        if arranque != self.arranque or not secuencia.isdigit():
+            return None
+        secuencia = int(secuencia)
+        if secuencia > self.secuencia:
+            return None
+        primero = int(self.buffer[0].id.rpartition("-")[2]) if self.buffer else self.secuencia + 1
+        if secuencia < primero - 1:
+            return None
+        return [evento for evento in list(self.buffer)[secuencia - primero + 1:] if suscriptor.acepta(evento)]
+
+    # Registrar y devolver lo que hay que reenviar antes de los eventos en vivo. Todo ocurre sin
+    # ceder el event loop, así que no se pierde ni se duplica ningún evento entre replay y cola.
+    def suscribir(self, suscriptor: Suscriptor, last_event_id: Optional[str] = None) -> list:
+        self.suscriptores.add(suscriptor)
+        if not last_event_id:
+            return []
+        pendientes = self.pendientes(suscriptor, last_event_id)
+        if pendientes is None:
+            return [formatear(f"{self.arranque}-{self.secuencia}", RESET, {})]
+        return [evento.sse for evento in pendientes]
+
+    def cancelar(self, suscriptor: Suscriptor):
+        self.suscriptores.discard(suscriptor)
+
+    def stats(self) -> dict:
+        return {"suscriptores": len(self.suscriptores), "publicados": self.publicados,
+                "buffer": len(self.buffer), "desconectados": self.desconectados}
+
+broadcaster = Broadcaster()
+
+# Pedidos y pagos (de este worker o de otro) hacia los streams; los de mesas los emite el tablero
+@pubsub.al_recibir(PEDIDO_CREADO, PEDIDO_DETALLES_AGREGADOS, PEDIDO_CERRADO, PEDIDO_CANCELADO, PAGO_REGISTRADO)
+def _reenviar(mensaje: pubsub.Mensaje):
+    broadcaster.publicar(mensaje.tipo, mensaje.datos, mensaje.id_usuario, mensaje.categorias)
+
+# Tras perder mensajes, los clientes deben recargar su estado
+@pubsub.al_recargar
+def _reset():
+    broadcaster.publicar(RESET, {})
+
+# Stream SSE de un suscriptor: replay, eventos en vivo y keepalive hasta que el cliente se va.
+# La suscripción se hace al empezar a iterar y se cancela en el finally: si la respuesta no llega
+# a arrancar (el cliente se fue antes), el suscriptor nunca se registra.
+async def stream(suscriptor: Suscriptor, last_event_id: Optional[str] = None, keepalive: float = EVENTS_KEEPALIVE):
+    try:
+        replay = broadcaster.suscribir(suscriptor, last_event_id)
+        yield "retry: 3000\n\n"
+        for mensaje in replay:
+            yield mensaje
+        while True:
+            try:
+                evento = await asyncio.wait_for(suscriptor.cola.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if evento is None:
+                return
+            yield evento.sse
+    finally:
+        broadcaster.cancelar(suscriptor)
+
+def publicar(tipo: str, datos, id_usuario: Optional[int] = None, categorias: Iterable = ()) -> Evento:
+    return broadcaster.publicar(tipo, datos, id_usuario, categorias)
@@ -0,0 +1,99 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from sqlalchemy import select
+from . import models
+from .database import AsyncSessionLocal
+
+# Pedidos por partición: una ida a la BD por partición para sus detalles y otra para sus pagos
+EXPORT_PARTITION_SIZE = int(os.getenv("EXPORT_PARTITION_SIZE", 1000))
+
+COLUMNAS_PEDIDO = (models.Pedido.id_pedido, models.Pedido.fecha_hora, models.Pedido.estado,
+                   models.Pedido.id_usuario, models.Pedido.id_mesa, models.Pedido.total)
+COLUMNAS_DETALLE = (models.DetallePedido.id_pedido, models.DetallePedido.id_detalle, models.DetallePedido.id_producto,
+                    models.DetallePedido.cantidad, models.DetallePedido.precio_unitario, models.DetallePedido.subtotal)
+COLUMNAS_PAGO = (models.Pago.id_pedido, models.Pago.id_pago, models.Pago.metodo_pago,
+                 models.Pago.monto, models.Pago.fecha_hora)
+
+# Filas del CSV según "tipo": "pedido" (una por pedido, solo la cabecera, así también aparecen los
+# que no tienen líneas ni pagos), "detalle" (una por línea) y "pago" (uno por pago); estas dos
+# repiten la cabecera del pedido y dejan vacías las columnas del otro tipo
+CABECERA_CSV = ("tipo", "id_pedido", "fecha_hora", "estado", "id_usuario", "id_mesa", "total",
+                "id_detalle", "id_producto", "cantidad", "precio_unitario", "subtotal",
+                "id_pago", "metodo_pago", "monto", "fecha_pago")
+
+def _valor(v):
+    if isinstance(v, datetime):
+        return v.isoformat()
+    return getattr(v, "value", v)  # enums -> su valor
+
+def _agrupar(filas) -> dict:
+    grupos = {}
+    for fila in filas:
+        grupos.setdefault(fila[0], []).append(fila)
+    return grupos
+
+async def particiones(desde: datetime, hasta: datetime):
+    """(pedidos, detalles por pedido, pagos por pedido) de EXPORT_PARTITION_SIZE en EXPORT_PARTITION_SIZE.
+
+    Sesión propia: la del request ya se cerró cuando empieza el streaming. Las cabeceras se leen
+    con un cursor del lado del servidor y se usan filas de Core (sin identity map), así que la
+    memoria no crece con el rango exportado.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            select(*COLUMNAS_PEDIDO)
+            .where(models.Pedido.fecha_hora >= desde, models.Pedido.fecha_hora < hasta)
+            .order_by(models.Pedido.fecha_hora, models.Pedido.id_pedido)
+            .execution_options(yield_per=EXPORT_PARTITION_SIZE)
+        )
+        async for pedidos in result.partitions():
+            ids = [p.id_pedido for p in pedidos]
+            detalles = await db.execute(select(*COLUMNAS_DETALLE).where(models.DetallePedido.id_pedido.in_(ids))
+                                        .order_by(models.DetallePedido.id_pedido, models.DetallePedido.id_detalle))
+            pagos = await db.execute(select(*COLUMNAS_PAGO).where(models.Pago.id_pedido.in_(ids))
+                                     .order_by(models.Pago.id_pedido, models.Pago.id_pago))
+            yield pedidos, _agrupar(detalles), _agrupar(pagos)
+
+# Una fila por pedido, otra por cada línea y otra por cada pago (ver CABECERA_CSV)
+async def exportar_csv(desde: datetime, hasta: datetime):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CABECERA_CSV)
+    vacio_detalle, vacio_pago = ("",) * 5, ("",) * 4
+    async for pedidos, detalles, pagos in particiones(desde, hasta):
+        for p in pedidos:
+            cabecera = tuple(_valor(v) for v in p)
+            writer.writerow(("pedido", *cabecera, *vacio_detalle, *vacio_pago))
+            for d in detalles.get(p.id_pedido, ()):
+                writer.writerow(("detalle", *cabecera, *d[1:], *vacio_pago))
+            for pago in pagos.get(p.id_pedido, ()):
+                writer.writerow(("pago", *cabecera, *vacio_detalle, pago.id_pago, _valor(pago.metodo_pago),
+                                 pago.monto, _valor(pago.fecha_hora)))
+        # Un chunk por partición: menos mensajes ASGI que uno por fila
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+# Un objeto JSON por pedido, con sus detalles y pagos anidados
+async def exportar_ndjson(desde: datetime, hasta: datetime):
+    async for pedidos, detalles, pagos in particiones(desde, hasta):
+        lineas = []
+        for p in pedidos:
+            pedido = {columna.key: _valor(v) for columna, v in zip(COLUMNAS_PEDIDO, p)}
+            pedido["detalles"] = [{columna.key: _valor(v) for columna, v in zip(COLUMNAS_DETALLE[1:], d[1:])}
+                                  for d in detalles.get(p.id_pedido, ())]
+            pedido["pagos"] = [{columna.key: _valor(v) for columna, v in zip(COLUMNAS_PAGO[1:], pago[1:])}
+                               for pago in pagos.get(p.id_pedido, ())]
+            lineas.append(json.dumps(pedido, ensure_ascii=False, separators=(",", ":")))
+        if lineas:
+            yield "\n".join(lineas) + "\n"
+
+FORMATOS = {
+    "csv": (exportar_csv, "text/csv; charset=utf-8"),
+    "ndjson": (exportar_ndjson, "application/x-ndjson"),
+}
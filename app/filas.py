@@ -0,0 +1,11 @@
+from collections import namedtuple
+
+# Filas ligeras para los listados de solo lectura: select() de las columnas de salida, sin
+# entidades ORM. Se copian a un namedtuple porque pydantic (from_attributes) lee sus campos
+# varias veces más rápido que los de un Row de SQLAlchemy, que resuelve cada nombre en su __getattr__.
+
+def tipo_fila(nombre: str, columnas) -> type:
+    return namedtuple(nombre, [columna.key for columna in columnas])
+
+def leer(tipo: type, result) -> list:
+    return list(map(tipo._make, result))
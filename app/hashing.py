@@ -0,0 +1,96 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+from passlib.context import CryptContext
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configuración del pool de hashing (bcrypt tarda ~200-300 ms por llamada)
+HASH_POOL_KIND = os.getenv("HASH_POOL_KIND", "thread")  # "thread" o "process"
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", 2))
+HASH_MAX_CONCURRENCY = int(os.getenv("HASH_MAX_CONCURRENCY", HASH_POOL_WORKERS))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Funciones a nivel de módulo para que se puedan enviar a un ProcessPoolExecutor
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+class PasswordHasher:
+    """Ejecuta bcrypt fuera del event loop, con un límite de concurrencia y métricas de cola."""
+
+    def __init__(self, kind: str = "thread", workers: int = 2, max_concurrency: Optional[int] = None):
+        self.kind = kind
+        self.workers = workers
+        self.max_concurrency = max_concurrency or workers
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Métricas
+        self.waiting = 0
+        self.in_flight = 0
+        self.max_waiting = 0
+        self.completed = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        started_at = time.perf_counter()
+        self.wait_seconds += started_at - queued_at
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self.run_seconds += time.perf_counter() - started_at
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(_verify, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_concurrency": self.max_concurrency,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "wait_seconds_total": round(self.wait_seconds, 6),
+            "run_seconds_total": round(self.run_seconds, 6),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+hasher = PasswordHasher(kind=HASH_POOL_KIND, workers=HASH_POOL_WORKERS, max_concurrency=HASH_MAX_CONCURRENCY)
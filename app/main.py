@@ -1,35 +1,79 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine, Base
-from .routers import auth, usuarios, productos, pedidos
+from fastapi.responses import JSONResponse, PlainTextResponse
+from .routers import auth, usuarios, productos, mesas, pedidos, eventos, reportes, admin
+from .hashing import hasher
+from .tablero import tablero
+from . import events, metrics, pubsub, querybudget, responses, startup
+from .database import async_pool_metrics, sync_pool_metrics
 import os
 
-# Crear las tablas en la base de datos (solo para desarrollo; en producción usar Alembic)
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(title="API Punto de Venta", description="Backend para restaurante con roles", version="1.0.0")
-
-# Configurar CORS para permitir peticiones desde el frontend (React)
-origins = [
-    "http://localhost:5173",  # Vite por defecto
-    "http://127.0.0.1:5173",
-    "http://localhost:3000",  # Por si acaso
-]
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Incluir routers
-app.include_router(auth.router)
-app.include_router(usuarios.router)
-app.include_router(productos.router)
-app.include_router(pedidos.router)
-
-@app.get("/")
-def root():
-    return {"message": "Bienvenido a la API del Restaurante"}
\ No newline at end of file
+# Arranque y apagado: sin create_all al importar (el esquema lo gestiona Alembic)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup.on_startup()
+    try:
+        yield
+    finally:
+        # Liberar los workers de bcrypt y las conexiones al apagar
+        hasher.shutdown()
+        await startup.on_shutdown()
+
+def create_app() -> FastAPI:
+    # FAST_JSON=1: el resto de rutas (las que devuelven objetos) se codifican con orjson/pydantic-core
+    default_response_class = responses.FastJSONResponse if responses.FAST_JSON else JSONResponse
+    app = FastAPI(title="API Punto de Venta", description="Backend para restaurante con roles", version="1.0.0",
+                  lifespan=lifespan, default_response_class=default_response_class)
+
+    # Configurar CORS para permitir peticiones desde el frontend (React)
+    origins = [
+        "http://localhost:5173",  # Vite por defecto
+        "http://127.0.0.1:5173",
+        "http://localhost:3000",  # Por si acaso
+    ]
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Métricas por ruta (latencia, códigos de estado, sentencias y tiempo de BD)
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    # Presupuesto de sentencias por ruta (QUERY_BUDGET_MODE=log|raise o capture_queries() en tests)
+    app.add_middleware(querybudget.QueryBudgetMiddleware)
+
+    # Incluir routers
+    app.include_router(auth.router)
+    app.include_router(usuarios.router)
+    app.include_router(productos.router)
+    app.include_router(mesas.router)
+    app.include_router(pedidos.router)
+    app.include_router(eventos.router)
+    app.include_router(reportes.router)
+    app.include_router(admin.router)
+
+    @app.get("/")
+    def root():
+        return {"message": "Bienvenido a la API del Restaurante"}
+
+    # Exposición en formato de texto de Prometheus
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        body = metrics.render(extra_gauges=[
+            ("db_pool", "Estado del pool de conexiones", "pool",
+             {"async": async_pool_metrics.snapshot(), "sync": sync_pool_metrics.snapshot()}),
+            ("password_hash", "Pool de hashing de contraseñas", "pool", {"bcrypt": hasher.stats()}),
+            ("mesas_board", "Tablero de mesas en memoria", "board", {"mesas": tablero.stats()}),
+            ("events", "Streams SSE de /eventos", "broadcaster", {"local": events.broadcaster.stats()}),
+            ("pubsub", "Propagación entre workers (LISTEN/NOTIFY)", "canal", {pubsub.bus.canal: pubsub.bus.stats()}),
+        ])
+        return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+    return app
+
+app = create_app()
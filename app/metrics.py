@@ -0,0 +1,165 @@
+import bisect
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+
+# Buckets por defecto de los clientes de Prometheus (segundos)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self.values: dict = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self.values.items():
+            yield f"{self.name}{_labels(self.labels, labels)} {value}"
+
+class Gauge(Counter):
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        for labels, value in self.values.items():
+            yield f"{self.name}{_labels(self.labels, labels)} {value}"
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self.values: dict = {}  # labels -> [conteo por bucket..., suma, total]
+
+    def observe(self, value: float, *labels):
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [0] * (len(self.buckets) + 2)
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            entry[index] += 1
+        entry[-2] += value
+        entry[-1] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, entry in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_labels(self.labels, labels, le)} {cumulative}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{_labels(self.labels, labels, le)} {entry[-1]}"
+            yield f"{self.name}_sum{_labels(self.labels, labels)} {entry[-2]}"
+            yield f"{self.name}_count{_labels(self.labels, labels)} {entry[-1]}"
+
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Latencia de las peticiones HTTP", ("method", "route"))
+REQUESTS = Counter("http_requests_total", "Peticiones HTTP por ruta y código de estado", ("method", "route", "status"))
+IN_FLIGHT = Gauge("http_requests_in_flight", "Peticiones HTTP en curso", ("method",))
+DB_STATEMENTS = Counter("db_statements_total", "Sentencias SQL ejecutadas por ruta", ("route",))
+DB_STATEMENTS_PER_REQUEST = Histogram("http_request_db_statements", "Sentencias SQL por petición",
+                                      ("route",), COUNT_BUCKETS)
+DB_TIME = Histogram("http_request_db_seconds", "Tiempo en la BD por petición", ("route",))
+
+class RequestStats:
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+# Estadísticas de la petición en curso; SQLAlchemy propaga el contexto a sus greenlets
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+def instrument_engine(engine):
+    # El inicio va en el contexto de ejecución de la sentencia: si falla no llega
+    # after_cursor_execute, y así no queda nada pendiente en la conexión del pool
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and current_request.get() is not None:
+            context._metrics_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = current_request.get()
+        started = getattr(context, "_metrics_start", None)
+        if stats is not None and started is not None:
+            stats.statements += 1
+            stats.db_seconds += time.perf_counter() - started
+
+def route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+class MetricsMiddleware:
+    """Middleware ASGI puro: latencia, estado y uso de BD por ruta, sin envolver la respuesta."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status_code = 500
+        stats = RequestStats()
+        token = current_request.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.dec(method)
+            current_request.reset(token)
+            route = route_label(scope)
+            REQUEST_LATENCY.observe(elapsed, method, route)
+            REQUESTS.inc(method, route, str(status_code))
+            DB_STATEMENTS.inc(route, amount=stats.statements)
+            DB_STATEMENTS_PER_REQUEST.observe(stats.statements, route)
+            DB_TIME.observe(stats.db_seconds, route)
+
+def _gauges_from(prefix: str, help: str, label: str, snapshots: dict):
+    # snapshots: {valor de la etiqueta: {métrica: valor numérico}}
+    names = sorted({key for snap in snapshots.values() for key, value in snap.items()
+                    if isinstance(value, (int, float)) and not isinstance(value, bool)})
+    for key in names:
+        yield f"# HELP {prefix}_{key} {help}"
+        yield f"# TYPE {prefix}_{key} gauge"
+        for label_value, snap in snapshots.items():
+            if key in snap:
+                yield f"{prefix}_{key}{_labels((label,), (label_value,))} {snap[key]}"
+
+# Texto en formato de exposición de Prometheus
+def render(extra_gauges=()) -> str:
+    lines = []
+    for metric in (REQUEST_LATENCY, REQUESTS, IN_FLIGHT, DB_STATEMENTS, DB_STATEMENTS_PER_REQUEST, DB_TIME):
+        lines.extend(metric.render())
+    for prefix, help, label, snapshots in extra_gauges:
+        lines.extend(_gauges_from(prefix, help, label, snapshots))
+    return "\n".join(lines) + "\n"
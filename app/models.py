@@ -1,6 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Enum, Computed, Index
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
+from sqlalchemy.sql.expression import FunctionElement
 from .database import Base
 import enum
 
@@ -23,6 +25,21 @@ class MetodoPagoEnum(str, enum.Enum):
     tarjeta = "tarjeta"
     transferencia = "transferencia"
 
+# Default de servidor para las fechas que se comparan con valores enlazados (cursores, rangos)
+class ahora(FunctionElement):
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+@compiles(ahora)
+def _ahora(element, compiler, **kw):
+    return compiler.process(func.now(), **kw)
+
+# SQLite guarda CURRENT_TIMESTAMP sin fracción y SQLAlchemy enlaza los datetime con seis decimales;
+# como ahí se comparan como texto, '...:SS' < '...:SS.000000' y el cursor no excluiría su propia fila
+@compiles(ahora, "sqlite")
+def _ahora_sqlite(element, compiler, **kw):
+    return "(strftime('%Y-%m-%d %H:%M:%f000', 'now'))"
+
 class Usuario(Base):
     __tablename__ = "usuarios"
 
@@ -49,6 +66,12 @@ class Producto(Base):
 
     detalles = relationship("DetallePedido", back_populates="producto")
 
+    __table_args__ = (
+        # Menú: solo productos activos (índice parcial)
+        Index("ix_productos_activos", "id_producto",
+              postgresql_where=text("activo"), sqlite_where=text("activo")),
+    )
+
 class Mesa(Base):
     __tablename__ = "mesas"
 
@@ -59,12 +82,12 @@ class Mesa(Base):
     pedidos = relationship("Pedido", back_populates="mesa")
 
 class Pedido(Base):
-    __tablenante__ = "pedidos"
+    __tablename__ = "pedidos"
 
     id_pedido = Column(Integer, primary_key=True, index=True)
     id_usuario = Column(Integer, ForeignKey("usuarios.id_usuario"), nullable=False)
-    id_mesa = Column(Integer, ForeignKey("mesas.id_mesa"))
-    fecha_hora = Column(DateTime(timezone=True), server_default=func.now())
+    id_mesa = Column(Integer, ForeignKey("mesas.id_mesa"), index=True)
+    fecha_hora = Column(DateTime(timezone=True), server_default=ahora())
     total = Column(Float, default=0.0)
     estado = Column(Enum(EstadoPedidoEnum), default="abierto")
 
@@ -73,15 +96,24 @@ class Pedido(Base):
     detalles = relationship("DetallePedido", back_populates="pedido", cascade="all, delete-orphan")
     pagos = relationship("Pago", back_populates="pedido")
 
+    __table_args__ = (
+        # Paginación por keyset: (fecha_hora, id_pedido) global y por empleado
+        Index("ix_pedidos_fecha_hora_id_pedido", "fecha_hora", "id_pedido"),
+        Index("ix_pedidos_usuario_fecha_hora_id_pedido", "id_usuario", "fecha_hora", "id_pedido"),
+        # Pedidos abiertos por mesa (índice parcial: solo las filas con estado 'abierto')
+        Index("ix_pedidos_abiertos_mesa", "id_mesa",
+              postgresql_where=text("estado = 'abierto'"), sqlite_where=text("estado = 'abierto'")),
+    )
+
 class DetallePedido(Base):
     __tablename__ = "detalle_pedido"
 
     id_detalle = Column(Integer, primary_key=True, index=True)
-    id_pedido = Column(Integer, ForeignKey("pedidos.id_pedido"), nullable=False)
-    id_producto = Column(Integer, ForeignKey("productos.id_producto"), nullable=False)
+    id_pedido = Column(Integer, ForeignKey("pedidos.id_pedido"), nullable=False, index=True)
+    id_producto = Column(Integer, ForeignKey("productos.id_producto"), nullable=False, index=True)
     cantidad = Column(Integer, nullable=False)
     precio_unitario = Column(Float, nullable=False)
-    subtotal = Column(Float, computed="cantidad * precio_unitario")  # Opcional, se puede calcular
+    subtotal = Column(Float, Computed("cantidad * precio_unitario"))  # Calculada por la BD
 
     pedido = relationship("Pedido", back_populates="detalles")
     producto = relationship("Producto", back_populates="detalles")
@@ -90,9 +122,21 @@ class Pago(Base):
     __tablename__ = "pagos"
 
     id_pago = Column(Integer, primary_key=True, index=True)
-    id_pedido = Column(Integer, ForeignKey("pedidos.id_pedido"), nullable=False)
+    id_pedido = Column(Integer, ForeignKey("pedidos.id_pedido"), nullable=False, index=True)
     metodo_pago = Column(Enum(MetodoPagoEnum), nullable=False)
     monto = Column(Float, nullable=False)
-    fecha_hora = Column(DateTime(timezone=True), server_default=func.now())
+    fecha_hora = Column(DateTime(timezone=True), server_default=ahora())
+
+    pedido = relationship("Pedido", back_populates="pagos")
+
+# Ventas pre-agregadas por hora y por día; se mantienen al cerrar, cancelar y pagar (ver app/rollup.py)
+class VentasRollup(Base):
+    __tablename__ = "ventas_rollup"
 
-    pedido = relationship("Pedido", back_populates="pagos")
\ No newline at end of file
+    granularidad = Column(String(4), primary_key=True)  # "hora" o "dia"
+    dimension = Column(String(12), primary_key=True)  # total, cancelados, producto, categoria, metodo_pago, empleado
+    periodo = Column(DateTime, primary_key=True)  # inicio del periodo en hora local (REPORTES_ZONA_HORARIA)
+    clave = Column(String(100), primary_key=True)  # id o nombre dentro de la dimensión; "" en total y cancelados
+    pedidos = Column(Integer, nullable=False, default=0)
+    unidades = Column(Integer, nullable=False, default=0)
+    ventas = Column(Float, nullable=False, default=0.0)
@@ -0,0 +1,25 @@
+import base64
+import json
+from datetime import datetime
+from typing import NamedTuple
+
+# Cursor opaco para paginar por (fecha_hora, id_pedido), del más reciente al más antiguo.
+# "n" pide la página siguiente (más antigua) y "p" la anterior (más reciente).
+class Cursor(NamedTuple):
+    direccion: str
+    fecha_hora: datetime
+    id_pedido: int
+
+def encode_cursor(direccion: str, fecha_hora: datetime, id_pedido: int) -> str:
+    raw = json.dumps([direccion, fecha_hora.isoformat(), id_pedido], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Cursor:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        direccion, fecha_hora, id_pedido = json.loads(raw)
+        if direccion not in ("n", "p"):
+            raise ValueError(direccion)
+        return Cursor(direccion, datetime.fromisoformat(fecha_hora), int(id_pedido))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Cursor inválido") from exc
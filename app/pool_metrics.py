@@ -0,0 +1,94 @@
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+class PoolMetrics:
+    """Métricas de un pool de conexiones: latencia de checkout, conexiones prestadas, overflow y cola de espera."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.engine = None
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.max_waiting = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.checkout_seconds_total = 0.0
+        self.checkout_seconds_max = 0.0
+
+    # Envuelve Pool._do_get (la espera real por una conexión libre)
+    def _timed_get(self, do_get):
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+        started = time.perf_counter()
+        try:
+            return do_get()
+        except PoolTimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.waiting -= 1
+                self.checkout_seconds_total += elapsed
+                self.checkout_seconds_max = max(self.checkout_seconds_max, elapsed)
+
+    def pool_class(self, base):
+        metrics = self
+
+        def _do_get(pool):
+            return metrics._timed_get(lambda: base._do_get(pool))
+
+        return type(f"Instrumented{base.__name__}", (base,), {"_do_get": _do_get})
+
+    # Los eventos se registran en el Engine para que sobrevivan a engine.dispose()
+    def attach(self, engine):
+        self.engine = engine
+
+        @event.listens_for(engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            self.connects += 1
+
+        @event.listens_for(engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            self.checkouts += 1
+
+        @event.listens_for(engine, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            self.checkins += 1
+
+        @event.listens_for(engine, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        pool = self.engine.pool if self.engine is not None else None
+        data = {
+            "name": self.name,
+            "pool_class": type(pool).__name__ if pool is not None else None,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+            "checkout_seconds_total": round(self.checkout_seconds_total, 6),
+            "checkout_seconds_max": round(self.checkout_seconds_max, 6),
+            "checkout_seconds_avg": round(self.checkout_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+        }
+        # Solo los pools tipo QueuePool tienen tamaño y overflow
+        if pool is not None and hasattr(pool, "overflow"):
+            data.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        return data
@@ -0,0 +1,222 @@
+import asyncio
+import json
+import logging
+import os
+import secrets
+from collections import defaultdict
+from contextlib import suppress
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterable, Optional
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+# Propagación entre workers con LISTEN/NOTIFY de PostgreSQL. "auto" la activa si la BD es
+# PostgreSQL; "off" la desactiva (un solo worker, o SQLite).
+PUBSUB = os.getenv("PUBSUB", "auto")
+PUBSUB_CHANNEL = os.getenv("PUBSUB_CHANNEL", "restaurante")
+PUBSUB_QUEUE_SIZE = int(os.getenv("PUBSUB_QUEUE_SIZE", 10000))  # mensajes pendientes de enviar
+PUBSUB_PING = float(os.getenv("PUBSUB_PING", 30))  # segundos sin tráfico tras los que se comprueba la conexión
+PUBSUB_MAX_BACKOFF = float(os.getenv("PUBSUB_MAX_BACKOFF", 30))
+NOTIFY_MAX_BYTES = 7900  # PostgreSQL rechaza payloads de 8000 bytes o más
+
+def _valor(v):
+    if isinstance(v, datetime):
+        return v.isoformat()
+    return getattr(v, "value", v)
+
+@dataclass(frozen=True, slots=True)
+class Mensaje:
+    origen: str  # worker que lo emitió
+    secuencia: int  # consecutiva por origen: un salto significa mensajes perdidos
+    tipo: str
+    datos: Optional[dict] = None
+    id_usuario: Optional[int] = None
+    categorias: tuple = ()
+
+    def payload(self) -> str:
+        campos = {"o": self.origen, "s": self.secuencia, "t": self.tipo, "d": self.datos,
+                  "u": self.id_usuario, "c": list(self.categorias)}
+        texto = json.dumps(campos, ensure_ascii=False, separators=(",", ":"), default=_valor)
+        if len(texto.encode()) > NOTIFY_MAX_BYTES and self.datos:
+            # Pedidos enormes: se envían sin las listas (líneas), marcados como truncados
+            campos["d"] = {k: v for k, v in self.datos.items() if not isinstance(v, list)} | {"truncado": True}
+            texto = json.dumps(campos, ensure_ascii=False, separators=(",", ":"), default=_valor)
+        return texto
+
+    @classmethod
+    def desde_payload(cls, texto: str) -> "Mensaje":
+        campos = json.loads(texto)
+        return cls(campos["o"], int(campos["s"]), campos["t"], campos.get("d"), campos.get("u"),
+                   tuple(campos.get("c") or ()))
+
+class Bus:
+    """Cambios de dominio (pedidos, mesas, menú, usuarios) hacia las cachés y streams de cada worker.
+
+    emitir() aplica el mensaje en este proceso con los manejadores registrados y lo encola para
+    enviarlo con NOTIFY; cada worker escucha el canal con una conexión propia y aplica los de los
+    demás con los mismos manejadores. Si se pierden mensajes (salto de secuencia, reconexión o
+    cola llena) se ejecutan las recargas registradas con al_recargar().
+    """
+
+    def __init__(self, canal: str = PUBSUB_CHANNEL):
+        self.canal = canal
+        self.origen = ""  # se genera en iniciar(): con --preload los workers heredarían el mismo del padre
+        self.secuencia = 0
+        self.manejadores = defaultdict(list)
+        self.recargas: list = []
+        self.ultimos: dict = {}  # origen -> última secuencia recibida
+        self.cola: Optional[asyncio.Queue] = None
+        self.en_vuelo: Optional[Mensaje] = None  # sacado de la cola y aún sin confirmar por el servidor
+        self.tarea: Optional[asyncio.Task] = None
+        self.conectado = False
+        self._arrancado = False
+        self.enviados = self.recibidos = self.descartados = 0
+        self.huecos = self.reconexiones = self.recargas_hechas = 0
+
+    def al_recibir(self, *tipos: str):
+        def registrar(fn: Callable[[Mensaje], None]):
+            for tipo in tipos:
+                self.manejadores[tipo].append(fn)
+            return fn
+        return registrar
+
+    def al_recargar(self, fn: Callable[[], object]):
+        self.recargas.append(fn)
+        return fn
+
+    # Llamar después del commit
+    def emitir(self, tipo: str, datos: Optional[dict] = None, id_usuario: Optional[int] = None,
+               categorias: Iterable = ()) -> Mensaje:
+        self.secuencia += 1
+        mensaje = Mensaje(self.origen, self.secuencia, tipo, datos, id_usuario, tuple(c for c in categorias if c))
+        self._aplicar(mensaje)
+        if self.cola is not None:
+            try:
+                self.cola.put_nowait(mensaje)
+            except asyncio.QueueFull:
+                # Los demás workers verán el salto de secuencia y recargarán
+                self.descartados += 1
+        return mensaje
+
+    def _aplicar(self, mensaje: Mensaje):
+        for fn in self.manejadores.get(mensaje.tipo, ()):
+            try:
+                fn(mensaje)
+            except Exception:
+                logger.exception("Error aplicando el mensaje %s", mensaje.tipo)
+
+    def recargar(self, motivo: str):
+        logger.warning("Recarga completa de cachés: %s", motivo)
+        self.recargas_hechas += 1
+        for fn in self.recargas:
+            try:
+                fn()
+            except Exception:
+                logger.exception("Error en una recarga")
+
+    def _recibir(self, texto: str):
+        try:
+            mensaje = Mensaje.desde_payload(texto)
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Mensaje ilegible en el canal %s", self.canal)
+            return
+        if mensaje.origen == self.origen:
+            return  # ya se aplicó al emitirlo
+        self.recibidos += 1
+        anterior = self.ultimos.get(mensaje.origen)
+        if anterior is not None and mensaje.secuencia <= anterior:
+            return  # reenvío de un mensaje cuyo NOTIFY sí llegó antes de caer la conexión
+        self.ultimos[mensaje.origen] = mensaje.secuencia
+        if anterior is not None and mensaje.secuencia != anterior + 1:
+            self.huecos += 1
+            self.recargar(f"mensajes perdidos de {mensaje.origen} ({anterior} -> {mensaje.secuencia})")
+        self._aplicar(mensaje)
+
+    async def iniciar(self, url: str, espera: float = 5):
+        self.origen = secrets.token_hex(6)
+        parsed = make_url(url)
+        if PUBSUB == "off" or parsed.get_backend_name() != "postgresql":
+            return
+        dsn = parsed.set(drivername="postgresql").render_as_string(hide_password=False)
+        self.cola = asyncio.Queue(PUBSUB_QUEUE_SIZE)
+        escuchando = asyncio.Event()
+        self.tarea = asyncio.create_task(self._ejecutar(dsn, escuchando))
+        # El LISTEN debe estar activo antes de cargar las cachés: así no se pierde nada entre medias
+        try:
+            await asyncio.wait_for(escuchando.wait(), espera)
+        except asyncio.TimeoutError:
+            logger.warning("El canal %s no está disponible; se seguirá reintentando", self.canal)
+        self._arrancado = True
+
+    async def detener(self):
+        if self.tarea is not None:
+            self.tarea.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.tarea
+        self.tarea = self.cola = self.en_vuelo = None
+        self._arrancado = False
+
+    async def _ejecutar(self, dsn: str, escuchando: asyncio.Event):
+        import asyncpg
+
+        backoff = 1.0
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(dsn, server_settings={"application_name": f"pubsub-{self.origen}"})
+                cerrada = asyncio.Event()
+                conn.add_termination_listener(lambda _conn: cerrada.set())
+                await conn.add_listener(self.canal, lambda _conn, _pid, _canal, payload: self._recibir(payload))
+                self.conectado = True
+                backoff = 1.0
+                if self._arrancado:
+                    # Lo que se publicó mientras no se escuchaba se perdió
+                    self.reconexiones += 1
+                    self.ultimos.clear()
+                    self.recargar("reconexión al canal")
+                escuchando.set()
+                await self._enviar(conn, cerrada)
+                logger.warning("Canal %s cerrado por el servidor; reintento en %.0fs", self.canal, backoff)
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError) as exc:
+                logger.warning("Canal %s caído (%s); reintento en %.0fs", self.canal, exc.__class__.__name__, backoff)
+            finally:
+                self.conectado = False
+                if conn is not None:
+                    conn.terminate()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, PUBSUB_MAX_BACKOFF)
+
+    # Un solo bucle por conexión: envía en orden y, si no hay tráfico, comprueba que siga viva.
+    # Vuelve en cuanto la conexión se cierra, aunque este worker no tenga nada que enviar.
+    # Si el NOTIFY falla, el mensaje queda en en_vuelo y es lo primero que se envía al reconectar.
+    async def _enviar(self, conn, cerrada: asyncio.Event):
+        fin = asyncio.ensure_future(cerrada.wait())
+        try:
+            while True:
+                if self.en_vuelo is None:
+                    siguiente = asyncio.ensure_future(self.cola.get())
+                    await asyncio.wait({siguiente, fin}, timeout=PUBSUB_PING, return_when=asyncio.FIRST_COMPLETED)
+                    if not siguiente.done():
+                        siguiente.cancel()
+                        if fin.done():
+                            return
+                        await conn.execute("SELECT 1")
+                        continue
+                    self.en_vuelo = siguiente.result()
+                await conn.execute("SELECT pg_notify($1, $2)", self.canal, self.en_vuelo.payload())
+                self.en_vuelo = None
+                self.enviados += 1
+        finally:
+            fin.cancel()
+
+    def stats(self) -> dict:
+        return {"conectado": int(self.conectado), "pendientes": (self.cola.qsize() if self.cola else 0) + (self.en_vuelo is not None),
+                "enviados": self.enviados, "recibidos": self.recibidos, "descartados": self.descartados,
+                "huecos": self.huecos, "reconexiones": self.reconexiones, "recargas": self.recargas_hechas}
+
+bus = Bus()
+emitir = bus.emitir
+al_recibir = bus.al_recibir
+al_recargar = bus.al_recargar
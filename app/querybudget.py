@@ -0,0 +1,140 @@
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# "off" en producción; "log" o "raise" en desarrollo y CI
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "off")
+# Presupuesto para rutas sin @query_budget (0 = sin límite)
+QUERY_BUDGET_DEFAULT = int(os.getenv("QUERY_BUDGET_DEFAULT", 0))
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+# Declarar cuántas sentencias puede ejecutar un endpoint (peor caso, incluida la autenticación)
+def query_budget(max_statements: int):
+    def decorator(endpoint):
+        endpoint.__query_budget__ = max_statements
+        return endpoint
+    return decorator
+
+# Marcadores de parámetros de los drivers soportados y literales numéricos
+_PLACEHOLDER = r"(?:\$\d+|\?|%\(\w+\)s|:\w+|\d+(?:\.\d+)?)"
+_PLACEHOLDER_LIST = re.compile(rf"{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*")
+_SPACES = re.compile(r"\s+")
+
+# Dos sentencias que solo difieren en parámetros (o en el largo de un IN expandido) quedan iguales
+def normalize(statement: str) -> str:
+    return _PLACEHOLDER_LIST.sub("?", _SPACES.sub(" ", statement).strip())
+
+class QueryLog:
+    __slots__ = ("route", "budget", "statements")
+
+    def __init__(self):
+        self.route: Optional[str] = None
+        self.budget: Optional[int] = None
+        self.statements: Counter = Counter()
+
+    @property
+    def count(self) -> int:
+        return sum(self.statements.values())
+
+    # Sentencias repetidas en la misma petición: el síntoma típico de un N+1
+    def repeated(self, threshold: int = 2) -> list:
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+    @property
+    def exceeded(self) -> bool:
+        return bool(self.budget) and self.count > self.budget
+
+    def report(self) -> str:
+        lines = [f"{self.route}: {self.count} sentencias (presupuesto {self.budget})"]
+        for sql, n in self.repeated() or self.statements.most_common(3):
+            lines.append(f"  {n}x {sql[:200]}")
+        return "\n".join(lines)
+
+current_log: ContextVar[Optional[QueryLog]] = ContextVar("current_query_log", default=None)
+
+def instrument_engine(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        log = current_log.get()
+        if log is not None:
+            log.statements[normalize(statement)] += 1
+
+class QueryCapture:
+    """Peticiones registradas mientras dura capture_queries()."""
+
+    def __init__(self, enforce: bool):
+        self.enforce = enforce
+        self.requests: List[QueryLog] = []
+
+    # route con el formato "MÉTODO /plantilla/{param}"
+    def for_route(self, route: str) -> List[QueryLog]:
+        return [log for log in self.requests if log.route == route]
+
+    @property
+    def violations(self) -> List[QueryLog]:
+        return [log for log in self.requests if log.exceeded]
+
+_captures: List[QueryCapture] = []
+_captures_lock = threading.Lock()
+
+# Para TestClient: el servidor corre en otro hilo, así que las capturas se registran globalmente.
+# Con enforce=True los presupuestos se aplican como en modo "raise" aunque QUERY_BUDGET_MODE sea "off".
+@contextmanager
+def capture_queries(enforce: bool = True):
+    capture = QueryCapture(enforce)
+    with _captures_lock:
+        _captures.append(capture)
+    try:
+        yield capture
+    finally:
+        with _captures_lock:
+            _captures.remove(capture)
+
+class QueryBudgetMiddleware:
+    """Middleware ASGI: cuenta las sentencias de cada petición y las compara con el presupuesto de la ruta."""
+
+    def __init__(self, app, mode: str = QUERY_BUDGET_MODE):
+        self.app = app
+        self.mode = mode
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (self.mode == "off" and not _captures):
+            await self.app(scope, receive, send)
+            return
+        log = QueryLog()
+        token = current_log.set(log)
+        enforce = self.mode == "raise" or any(capture.enforce for capture in _captures)
+
+        def resolve():
+            route = scope.get("route")
+            log.route = f'{scope["method"]} {getattr(route, "path", None) or "<unmatched>"}'
+            log.budget = getattr(getattr(route, "endpoint", None), "__query_budget__", QUERY_BUDGET_DEFAULT)
+
+        async def send_wrapper(message):
+            # Comprobar antes de enviar la cabecera para que el fallo llegue como error 500 al cliente
+            if message["type"] == "http.response.start":
+                resolve()
+                if enforce and log.exceeded:
+                    raise QueryBudgetExceeded(log.report())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_log.reset(token)
+            if log.route is None:
+                resolve()
+            for capture in list(_captures):
+                capture.requests.append(log)
+            if log.exceeded and not enforce:
+                logger.warning("Presupuesto de consultas excedido\n%s", log.report())
@@ -0,0 +1,48 @@
+import os
+from typing import Any, List, Optional
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+from . import schemas
+
+try:
+    import orjson
+except ImportError:  # opcional: sin orjson se usa el serializador de pydantic-core
+    orjson = None
+
+# FAST_JSON=1 hace de FastJSONResponse la respuesta por defecto de la app (ver create_app)
+FAST_JSON = os.getenv("FAST_JSON", "0") == "1"
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse que serializa con orjson si está instalado o, si no, con pydantic-core.
+
+    Un cuerpo en bytes se considera ya serializado (por ejemplo, por un TypeAdapter) y se envía tal cual.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return to_json(content)
+
+# TypeAdapters compilados una vez al importar para los esquemas de los listados
+productos_adapter = TypeAdapter(List[schemas.ProductoOut])
+producto_adapter = TypeAdapter(schemas.ProductoOut)
+usuarios_adapter = TypeAdapter(List[schemas.UsuarioOut])
+mesas_adapter = TypeAdapter(List[schemas.MesaOut])
+tablero_adapter = TypeAdapter(List[schemas.MesaTablero])
+pedidos_adapter = TypeAdapter(List[schemas.PedidoOut])
+pedido_adapter = TypeAdapter(schemas.PedidoOut)
+resumen_adapter = TypeAdapter(List[schemas.PedidoResumen])
+pagina_adapter = TypeAdapter(schemas.PedidoPage)
+
+# Filas ORM, tuplas de Core o dicts a bytes JSON en una sola pasada por pydantic-core. Con
+# response_model, FastAPI valida, vuelca a dicts de Python y después los codifica con json.
+def dump_json(adapter: TypeAdapter, contenido) -> bytes:
+    return adapter.dump_json(adapter.validate_python(contenido, from_attributes=True))
+
+def json_response(adapter: TypeAdapter, contenido, status_code: int = 200,
+                  headers: Optional[dict] = None) -> Response:
+    return Response(content=dump_json(adapter, contenido), status_code=status_code,
+                    media_type="application/json", headers=headers)
@@ -0,0 +1,160 @@
+import os
+from collections import defaultdict
+from datetime import date, datetime, time, timezone
+from zoneinfo import ZoneInfo
+from sqlalchemy import String, cast, delete, func, insert, literal, literal_column, select
+from sqlalchemy.dialects import postgresql, sqlite
+from . import models
+
+# Zona horaria en la que se cortan días y horas (solo PostgreSQL; SQLite guarda fechas UTC sin zona).
+# Si cambia, hay que reconstruir los rollups (python -m scripts.rebuild_rollup).
+REPORTES_ZONA_HORARIA = os.getenv("REPORTES_ZONA_HORARIA", "UTC")
+
+GRANULARIDADES = {"hora": "hour", "dia": "day"}
+DIMENSIONES = ("total", "cancelados", "producto", "categoria", "metodo_pago", "empleado")
+tabla = models.VentasRollup.__table__
+COLUMNAS = ("granularidad", "dimension", "periodo", "clave", "pedidos", "unidades", "ventas")
+
+def zona(dialect: str):
+    return ZoneInfo(REPORTES_ZONA_HORARIA) if dialect == "postgresql" else timezone.utc
+
+# Fecha -> hora local sin zona, como se guarda en ventas_rollup.periodo
+def a_local(fecha: datetime, dialect: str) -> datetime:
+    if fecha.tzinfo is not None:
+        fecha = fecha.astimezone(zona(dialect)).replace(tzinfo=None)
+    return fecha
+
+def inicio_periodo(local: datetime, granularidad: str) -> datetime:
+    local = local.replace(minute=0, second=0, microsecond=0)
+    return local.replace(hour=0) if granularidad == "dia" else local
+
+# Equivalente en SQL de inicio_periodo(a_local(...)) para la reconstrucción
+def truncar_fecha(dialect: str, columna, granularidad: str):
+    if dialect == "postgresql":
+        return func.date_trunc(GRANULARIDADES[granularidad], func.timezone(REPORTES_ZONA_HORARIA, columna))
+    # Mismo texto con el que SQLAlchemy guarda un DateTime en SQLite: si no, la clave primaria no coincide
+    formato = "%Y-%m-%d 00:00:00.000000" if granularidad == "dia" else "%Y-%m-%d %H:00:00.000000"
+    return func.strftime(formato, columna)
+
+def _valor(v):
+    return getattr(v, "value", v)
+
+class Acumulador:
+    """Deltas por (granularidad, dimensión, periodo, clave) que se suman a ventas_rollup en un solo UPSERT."""
+
+    def __init__(self, dialect: str):
+        self.dialect = dialect
+        self.filas = defaultdict(lambda: [0, 0, 0.0])
+
+    def sumar(self, fecha: datetime, dimension: str, clave="", pedidos: int = 0, unidades: int = 0, ventas: float = 0.0):
+        local = a_local(fecha, self.dialect)
+        for granularidad in GRANULARIDADES:
+            fila = self.filas[(granularidad, dimension, inicio_periodo(local, granularidad), str(_valor(clave)))]
+            fila[0] += pedidos
+            fila[1] += unidades
+            fila[2] += ventas
+
+    def cierre(self, pedido: models.Pedido, categorias: dict):
+        fecha = pedido.fecha_hora
+        self.sumar(fecha, "total", pedidos=1, ventas=pedido.total)
+        self.sumar(fecha, "empleado", pedido.id_usuario, pedidos=1, ventas=pedido.total)
+        por_categoria = defaultdict(lambda: [0, 0.0])
+        for detalle in pedido.detalles:
+            self.sumar(fecha, "producto", detalle.id_producto, 1, detalle.cantidad, detalle.subtotal)
+            acumulado = por_categoria[categorias.get(detalle.id_producto) or ""]
+            acumulado[0] += detalle.cantidad
+            acumulado[1] += detalle.subtotal
+        # pedidos = pedidos que contienen la categoría, no líneas
+        for categoria, (unidades, ventas) in por_categoria.items():
+            self.sumar(fecha, "categoria", categoria, 1, unidades, ventas)
+
+    # signo=-1 al cancelar: lo cobrado de un pedido cancelado se descuenta
+    def pagos(self, pagos, signo: int = 1):
+        for pago in pagos:
+            self.sumar(pago.fecha_hora, "metodo_pago", pago.metodo_pago, pedidos=signo, ventas=signo * pago.monto)
+
+    def valores(self) -> list:
+        # Orden fijo de claves: dos cierres concurrentes bloquean las filas en el mismo orden (sin deadlocks)
+        return [dict(zip(COLUMNAS, (*clave, *fila))) for clave, fila in sorted(self.filas.items())]
+
+async def acumular(db, acumulador: Acumulador):
+    valores = acumulador.valores()
+    if not valores:
+        return
+    dialect_insert = postgresql.insert if acumulador.dialect == "postgresql" else sqlite.insert
+    stmt = dialect_insert(tabla).values(valores)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=list(tabla.primary_key.columns),
+        set_={c: tabla.c[c] + stmt.excluded[c] for c in ("pedidos", "unidades", "ventas")},
+    ))
+
+def dialecto(db) -> str:
+    return db.get_bind().dialect.name
+
+# Llamadas dentro de la transacción del endpoint, justo antes del commit
+async def registrar_cierre(db, pedido: models.Pedido):
+    ids = {detalle.id_producto for detalle in pedido.detalles}
+    result = await db.execute(select(models.Producto.id_producto, models.Producto.categoria)
+                              .where(models.Producto.id_producto.in_(ids)))
+    acumulador = Acumulador(dialecto(db))
+    acumulador.cierre(pedido, dict(result.all()))
+    await acumular(db, acumulador)
+
+async def registrar_cancelacion(db, pedido: models.Pedido):
+    acumulador = Acumulador(dialecto(db))
+    acumulador.sumar(pedido.fecha_hora, "cancelados", pedidos=1)
+    acumulador.pagos(pedido.pagos, signo=-1)
+    await acumular(db, acumulador)
+
+async def registrar_pago(db, pago: models.Pago):
+    acumulador = Acumulador(dialecto(db))
+    acumulador.pagos([pago])
+    await acumular(db, acumulador)
+
+def _agregado(granularidad: str, dimension: str, periodo, clave, pedidos, unidades, ventas):
+    return select(literal(granularidad).label("granularidad"), literal(dimension).label("dimension"),
+                  periodo.label("periodo"), clave.label("clave"), pedidos.label("pedidos"),
+                  unidades.label("unidades"), func.coalesce(ventas, 0.0).label("ventas"))
+
+def sentencias_reconstruccion(dialect: str, dia_desde: date, dia_hasta: date) -> list:
+    """DELETE + INSERT ... SELECT que recalculan los rollups de los días locales [dia_desde, dia_hasta).
+
+    Los bloques de días son disjuntos, así que varios rangos pueden reconstruirse en paralelo.
+    """
+    local_desde, local_hasta = datetime.combine(dia_desde, time()), datetime.combine(dia_hasta, time())
+    inicio, fin = local_desde, local_hasta
+    if dialect == "postgresql":
+        inicio, fin = local_desde.replace(tzinfo=zona(dialect)), local_hasta.replace(tzinfo=zona(dialect))
+    Pedido, Detalle, Pago, Producto = models.Pedido, models.DetallePedido, models.Pago, models.Producto
+    en_rango = (Pedido.fecha_hora >= inicio, Pedido.fecha_hora < fin)
+    cerrado = Pedido.estado == "cerrado"
+    posiciones = [literal_column(str(n)) for n in (1, 2, 3, 4)]
+    sentencias = [delete(tabla).where(tabla.c.periodo >= local_desde, tabla.c.periodo < local_hasta)]
+    for g in GRANULARIDADES:
+        periodo = truncar_fecha(dialect, Pedido.fecha_hora, g)
+        consultas = [
+            _agregado(g, "total", periodo, literal(""), func.count(), literal(0), func.sum(Pedido.total))
+            .where(cerrado, *en_rango),
+            _agregado(g, "cancelados", periodo, literal(""), func.count(), literal(0), literal(0.0))
+            .where(Pedido.estado == "cancelado", *en_rango),
+            _agregado(g, "empleado", periodo, cast(Pedido.id_usuario, String), func.count(), literal(0),
+                      func.sum(Pedido.total))
+            .where(cerrado, *en_rango),
+            _agregado(g, "producto", periodo, cast(Detalle.id_producto, String), func.count(),
+                      func.sum(Detalle.cantidad), func.sum(Detalle.subtotal))
+            .select_from(Detalle).join(Pedido, Pedido.id_pedido == Detalle.id_pedido)
+            .where(cerrado, *en_rango),
+            _agregado(g, "categoria", periodo, func.coalesce(Producto.categoria, ""),
+                      func.count(Pedido.id_pedido.distinct()), func.sum(Detalle.cantidad), func.sum(Detalle.subtotal))
+            .select_from(Detalle).join(Pedido, Pedido.id_pedido == Detalle.id_pedido)
+            .join(Producto, Producto.id_producto == Detalle.id_producto)
+            .where(cerrado, *en_rango),
+            # Lo cobrado va por la fecha del pago y excluye los pedidos cancelados
+            _agregado(g, "metodo_pago", truncar_fecha(dialect, Pago.fecha_hora, g), cast(Pago.metodo_pago, String),
+                      func.count(), literal(0), func.sum(Pago.monto))
+            .select_from(Pago).join(Pedido, Pedido.id_pedido == Pago.id_pedido)
+            .where(Pedido.estado != "cancelado", Pago.fecha_hora >= inicio, Pago.fecha_hora < fin),
+        ]
+        for consulta in consultas:
+            sentencias.append(insert(tabla).from_select(COLUMNAS, consulta.group_by(*posiciones)))
+    return sentencias
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends
+from .. import dependencies
+from ..database import async_pool_metrics, sync_pool_metrics
+from . import pedidos, productos
+
+router = APIRouter(prefix="/admin", tags=["Administración"])
+
+# Estado de los pools de conexiones (solo admin)
+@router.get("/pool")
+async def pool_stats(admin: dependencies.Principal = Depends(dependencies.get_current_admin)):
+    return {"async": async_pool_metrics.snapshot(), "sync": sync_pool_metrics.snapshot()}
+
+# Estado de las cachés en memoria de este worker (solo admin)
+@router.get("/caches")
+async def cache_stats(admin: dependencies.Principal = Depends(dependencies.get_current_admin)):
+    return {"principals": dependencies.principal_cache.stats(), "menu": productos.menu_cache.stats(),
+            "pedidos_finalizados": pedidos.pedidos_finalizados.stats()}
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from .. import models, dependencies, events
+
+router = APIRouter(prefix="/eventos", tags=["Eventos"])
+
+# Stream SSE de pedidos, pagos y mesas (en lugar de sondear GET /pedidos).
+# Al reconectar, el cliente envía Last-Event-ID y recibe lo que se perdió; si ya no está en el
+# buffer recibe un evento "reset" y debe recargar el estado completo.
+# Autenticación: cabecera Authorization o, para EventSource (que no envía cabeceras),
+# ?access_token=<jwt> o la cookie access_token (ver dependencies.get_current_user_sse).
+@router.get("/")
+async def stream_eventos(tipo: Optional[List[str]] = Query(None),
+                         categoria: Optional[List[str]] = Query(None),
+                         id_usuario: Optional[int] = None,
+                         last_event_id: Optional[str] = Header(None),
+                         current_user: dependencies.Principal = Depends(dependencies.get_current_user_sse)):
+    if tipo is not None and not set(tipo) <= set(events.TIPOS):
+        raise HTTPException(status_code=400, detail=f"Tipos válidos: {', '.join(events.TIPOS)}")
+    # Un empleado solo puede filtrar por sí mismo
+    if id_usuario is not None and current_user.rol != models.RolEnum.admin and id_usuario != current_user.id_usuario:
+        raise HTTPException(status_code=403, detail="No tienes permiso para ver los eventos de otro usuario")
+    suscriptor = events.Suscriptor(
+        rol=current_user.rol, id_usuario=current_user.id_usuario,
+        tipos=frozenset(tipo) if tipo else None,
+        categorias=frozenset(categoria) if categoria else None,
+        solo_usuario=id_usuario,
+    )
+    return StreamingResponse(events.stream(suscriptor, last_event_id), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,104 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from .. import models, schemas, dependencies, pubsub
+from ..etags import etag_matches, not_modified
+from ..querybudget import query_budget
+from ..responses import json_response, mesas_adapter
+from ..tablero import MESA_ELIMINADA, MESA_GUARDADA, tablero
+
+router = APIRouter(prefix="/mesas", tags=["Mesas"])
+
+# ¿La mesa tiene algún pedido abierto?
+async def tiene_pedidos_abiertos(db: AsyncSession, mesa_id: int) -> bool:
+    return bool(await db.scalar(
+        select(select(models.Pedido.id_pedido)
+               .where(models.Pedido.id_mesa == mesa_id, models.Pedido.estado == "abierto").exists())
+    ))
+
+# Alta o cambio de una mesa hacia el tablero de todos los workers (después del commit)
+def emitir_mesa(mesa: models.Mesa):
+    pubsub.emitir(MESA_GUARDADA, {"id_mesa": mesa.id_mesa, "numero_mesa": mesa.numero_mesa, "estado": mesa.estado})
+
+# Ver todas las mesas
+@router.get("/", response_model=List[schemas.MesaOut])
+async def read_mesas(db: AsyncSession = Depends(dependencies.get_db),
+                     current_user: dependencies.Principal = Depends(dependencies.get_current_user)):
+    result = await db.scalars(select(models.Mesa).order_by(models.Mesa.numero_mesa))
+    return json_response(mesas_adapter, result.all())
+
+# Plano de sala: estado, pedidos abiertos y total de cada mesa, servido desde memoria
+# (solo va a la BD en la primera lectura o cuando el tablero caduca)
+@router.get("/board", response_model=List[schemas.MesaTablero])
+@query_budget(3)
+async def read_tablero(if_none_match: Optional[str] = Header(None),
+                       db: AsyncSession = Depends(dependencies.get_db),
+                       current_user: dependencies.Principal = Depends(dependencies.get_current_user)):
+    if not tablero.vigente():
+        await tablero.cargar(db)
+    body, etag = tablero.serializado()
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+# Ver una mesa por ID
+@router.get("/{mesa_id}", response_model=schemas.MesaOut)
+async def read_mesa(mesa_id: int,
+                    db: AsyncSession = Depends(dependencies.get_db),
+                    current_user: dependencies.Principal = Depends(dependencies.get_current_user)):
+    mesa = await db.scalar(select(models.Mesa).where(models.Mesa.id_mesa == mesa_id))
+    if not mesa:
+        raise HTTPException(status_code=404, detail="Mesa no encontrada")
+    return mesa
+
+# Crear mesa (solo admin)
+@router.post("/", response_model=schemas.MesaOut, status_code=status.HTTP_201_CREATED)
+async def create_mesa(mesa: schemas.MesaCreate,
+                      db: AsyncSession = Depends(dependencies.get_db),
+                      admin: dependencies.Principal = Depends(dependencies.get_current_admin)):
+    existente = await db.scalar(select(models.Mesa.id_mesa).where(models.Mesa.numero_mesa == mesa.numero_mesa))
+    if existente:
+        raise HTTPException(status_code=400, detail="Ya existe una mesa con ese número")
+    db_mesa = models.Mesa(numero_mesa=mesa.numero_mesa, estado=mesa.estado.value)
+    db.add(db_mesa)
+    await db.commit()
+    await db.refresh(db_mesa)
+    emitir_mesa(db_mesa)
+    return db_mesa
+
+# Cambiar el estado de una mesa (reservar, liberar...) - empleado o admin
+@router.put("/{mesa_id}", response_model=schemas.MesaOut)
+async def update_mesa(mesa_id: int,
+                      mesa_update: schemas.MesaUpdate,
+                      db: AsyncSession = Depends(dependencies.get_db),
+                      current_user: dependencies.Principal = Depends(dependencies.get_current_user)):
+    # Fila bloqueada hasta el commit: create_pedido ocupa la mesa con un UPDATE antes de insertar
+    # el pedido, así que un alta concurrente espera aquí o ya está confirmada al comprobar
+    db_mesa = await db.scalar(select(models.Mesa).where(models.Mesa.id_mesa == mesa_id).with_for_update())
+    if not db_mesa:
+        raise HTTPException(status_code=404, detail="Mesa no encontrada")
+    if mesa_update.estado is not None:
+        # Una mesa con pedidos abiertos solo se libera cerrándolos o cancelándolos
+        if mesa_update.estado != schemas.EstadoMesaEnum.ocupada and await tiene_pedidos_abiertos(db, mesa_id):
+            raise HTTPException(status_code=400, detail="La mesa tiene pedidos abiertos")
+        db_mesa.estado = mesa_update.estado.value
+    await db.commit()
+    emitir_mesa(db_mesa)
+    return db_mesa
+
+# Eliminar mesa (solo admin) - solo si nunca tuvo pedidos
+@router.delete("/{mesa_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_mesa(mesa_id: int,
+                      db: AsyncSession = Depends(dependencies.get_db),
+                      admin: dependencies.Principal = Depends(dependencies.get_current_admin)):
+    db_mesa = await db.scalar(select(models.Mesa).where(models.Mesa.id_mesa == mesa_id))
+    if not db_mesa:
+        raise HTTPException(status_code=404, detail="Mesa no encontrada")
+    con_pedidos = await db.scalar(select(models.Pedido.id_pedido).where(models.Pedido.id_mesa == mesa_id).limit(1))
+    if con_pedidos:
+        raise HTTPException(status_code=400, detail="La mesa tiene pedidos registrados")
+    await db.delete(db_mesa)
+    await db.commit()
+    pubsub.emitir(MESA_ELIMINADA, {"id_mesa": mesa_id})
+    return None
@@ -1,112 +1,428 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
-from typing import List
-from .. import models, schemas, dependencies
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import List, Literal, NamedTuple, Optional, Union
+from datetime import datetime
+from .. import models, schemas, dependencies, events, export, pubsub, rollup
+from ..cache import ByteLRUCache
+from ..filas import leer, tipo_fila
+from ..querybudget import query_budget
+from ..etags import etag_matches, make_etag, not_modified
+from ..pagination import decode_cursor, encode_cursor
+from ..responses import dump_json, json_response, pagina_adapter, pedido_adapter, pedidos_adapter, resumen_adapter
+import os
 
 router = APIRouter(prefix="/pedidos", tags=["Pedidos"])
 
+# Cargar un pedido con sus detalles y pagos (en async no hay lazy loading)
+async def get_pedido_completo(db: AsyncSession, pedido_id: int):
+    result = await db.execute(
+        select(models.Pedido).where(models.Pedido.id_pedido == pedido_id)
+        .options(joinedload(models.Pedido.detalles), joinedload(models.Pedido.pagos))
+        .execution_options(populate_existing=True)
+    )
+    return result.unique().scalar_one_or_none()
+
+# Agrupar las líneas repetidas del mismo producto y resolver precio y categoría en una sola consulta
+async def resolver_lineas(db: AsyncSession, detalles: List[schemas.DetallePedidoBase]) -> tuple:
+    cantidades = {}
+    for det in detalles:
+        cantidades[det.id_producto] = cantidades.get(det.id_producto, 0) + det.cantidad
+    result = await db.execute(
+        select(models.Producto.id_producto, models.Producto.precio, models.Producto.categoria)
+        .where(models.Producto.id_producto.in_(list(cantidades)), models.Producto.activo == True)
+    )
+    productos = {fila.id_producto: fila for fila in result}
+    for id_producto in cantidades:
+        if id_producto not in productos:
+            raise HTTPException(status_code=400, detail=f"Producto ID {id_producto} no disponible")
+    return cantidades, productos
+
+# Insertar todos los detalles en un único INSERT multi-fila (insertmanyvalues)
+async def insertar_detalles(db: AsyncSession, id_pedido: int, cantidades: dict, productos: dict) -> list:
+    if not cantidades:
+        return []
+    result = await db.scalars(
+        insert(models.DetallePedido).returning(models.DetallePedido),
+        [
+            {"id_pedido": id_pedido, "id_producto": id_producto,
+             "cantidad": cantidad, "precio_unitario": productos[id_producto].precio}
+            for id_producto, cantidad in cantidades.items()
+        ],
+    )
+    return result.all()
+
+# Cambio de un pedido hacia el tablero de mesas y los streams de /eventos de todos los workers
+# (llamar después del commit). Las líneas nuevas llevan su categoría para que cada pantalla
+# de cocina filtre las suyas.
+def publicar_pedido(tipo: str, pedido: models.Pedido, detalles: list = (), productos: dict = None):
+    datos = {"id_pedido": pedido.id_pedido, "id_mesa": pedido.id_mesa, "id_usuario": pedido.id_usuario,
+             "estado": pedido.estado, "total": pedido.total}
+    categorias = []
+    if detalles:
+        datos["detalles"] = [
+            {"id_detalle": d.id_detalle, "id_producto": d.id_producto, "cantidad": d.cantidad,
+             "precio_unitario": d.precio_unitario, "categoria": productos[d.id_producto].categoria}
+            for d in detalles
+        ]
+        categorias = [productos[d.id_producto].categoria for d in detalles]
+    pubsub.emitir(tipo, datos, id_usuario=pedido.id_usuario, categorias=categorias)
+
 # Crear pedido (empleado o admin)
 @router.post("/", response_model=schemas.PedidoOut, status_code=status.HTTP_201_CREATED)
+@query_budget(5)
 async def create_pedido(pedido: schemas.PedidoCreate,
-                        db: Session = Depends(dependencies.get_db),
-                        current_user: models.Usuario = Depends(dependencies.get_current_user)):
-    # Crear cabecera del pedido
-    db_pedido = models.Pedido(
-        id_usuario=current_user.id_usuario,
-        id_mesa=pedido.id_mesa,
-        estado="abierto"
-    )
-    db.add(db_pedido)
-    db.flush()  # Para obtener el id_pedido antes de commit
-
-    # Procesar detalles
-    total = 0.0
-    for det in pedido.detalles:
-        producto = db.query(models.Producto).filter(models.Producto.id_producto == det.id_producto).first()
-        if not producto or not producto.activo:
-            raise HTTPException(status_code=400, detail=f"Producto ID {det.id_producto} no disponible")
-        precio = producto.precio
-        subtotal = precio * det.cantidad
-        total += subtotal
-        db_detalle = models.DetallePedido(
-            id_pedido=db_pedido.id_pedido,
-            id_producto=det.id_producto,
-            cantidad=det.cantidad,
-            precio_unitario=precio,
+                        db: AsyncSession = Depends(dependencies.get_db),
+                        current_user: dependencies.Principal = Depends(dependencies.get_current_user)):
+    cantidades, productos = await resolver_lineas(db, pedido.detalles)
+    total = sum(productos[id_producto].precio * cantidad for id_producto, cantidad in cantidades.items())
+
+    # Ocupar la mesa en la misma transacción que el pedido
+    if pedido.id_mesa is not None:
+        result = await db.execute(
+            update(models.Mesa).where(models.Mesa.id_mesa == pedido.id_mesa).values(estado="ocupada"),
+            execution_options={"synchronize_session": False},
         )
-        db.add(db_detalle)
+        if result.rowcount == 0:
+            raise HTTPException(status_code=400, detail=f"Mesa ID {pedido.id_mesa} no existe")
+
+    # Crear cabecera del pedido (INSERT ... RETURNING, sin flush ni refresh)
+    db_pedido = await db.scalar(
+        insert(models.Pedido)
+        .values(id_usuario=current_user.id_usuario, id_mesa=pedido.id_mesa, estado="abierto", total=total)
+        .returning(models.Pedido)
+    )
+    detalles = await insertar_detalles(db, db_pedido.id_pedido, cantidades, productos)
+    await db.commit()
+    publicar_pedido(events.PEDIDO_CREADO, db_pedido, detalles, productos)
+
+    # Devolver con relaciones (detalles) sin volver a consultar
+    set_committed_value(db_pedido, "detalles", detalles)
+    set_committed_value(db_pedido, "pagos", [])
+    return json_response(pedido_adapter, db_pedido, status_code=status.HTTP_201_CREATED)
 
-    db_pedido.total = total
-    db.commit()
-    db.refresh(db_pedido)
+# Columnas de cabecera (PedidoResumen), en el orden de PedidoLectura
+COLUMNAS_RESUMEN = (
+    models.Pedido.id_pedido, models.Pedido.id_usuario, models.Pedido.id_mesa,
+    models.Pedido.fecha_hora, models.Pedido.total, models.Pedido.estado,
+)
+CabeceraFila = tipo_fila("CabeceraFila", COLUMNAS_RESUMEN)
+DetalleFila = tipo_fila("DetalleFila", export.COLUMNAS_DETALLE)
+PagoFila = tipo_fila("PagoFila", export.COLUMNAS_PAGO)
+# Ids por SELECT ... IN, como selectinload
+LOTE_IN = 500
 
-    # Devolver con relaciones (detalles)
-    return db_pedido
+class PedidoLectura(NamedTuple):
+    """Pedido de solo lectura para los listados: cabecera, detalles y pagos leídos con Core."""
+    id_pedido: int
+    id_usuario: int
+    id_mesa: Optional[int]
+    fecha_hora: datetime
+    total: float
+    estado: models.EstadoPedidoEnum
+    detalles: list
+    pagos: list
+
+# Detalles y pagos de unas cabeceras (COLUMNAS_RESUMEN): un SELECT ... IN por colección, igual que
+# selectinload, pero sin construir entidades ORM ni pasarlas por el identity map
+async def con_lineas(db: AsyncSession, cabeceras) -> List[PedidoLectura]:
+    ids = [p.id_pedido for p in cabeceras]
+    detalles, pagos = {}, {}
+    for i in range(0, len(ids), LOTE_IN):
+        lote = ids[i:i + LOTE_IN]
+        for d in leer(DetalleFila, await db.execute(
+                select(*export.COLUMNAS_DETALLE).where(models.DetallePedido.id_pedido.in_(lote))
+                .order_by(models.DetallePedido.id_detalle))):
+            detalles.setdefault(d.id_pedido, []).append(d)
+        for pago in leer(PagoFila, await db.execute(
+                select(*export.COLUMNAS_PAGO).where(models.Pago.id_pedido.in_(lote))
+                .order_by(models.Pago.id_pago))):
+            pagos.setdefault(pago.id_pedido, []).append(pago)
+    return [PedidoLectura(*p, detalles.get(p.id_pedido, []), pagos.get(p.id_pedido, [])) for p in cabeceras]
 
 # Listar pedidos (admin ve todos, empleado solo los suyos)
-@router.get("/", response_model=List[schemas.PedidoOut])
+# view=summary devuelve solo la cabecera (PedidoResumen) sin cargar detalles ni pagos
+@router.get("/", response_model=Union[List[schemas.PedidoOut], List[schemas.PedidoResumen]])
+@query_budget(4)
 async def read_pedidos(skip: int = 0, limit: int = 100,
-                       db: Session = Depends(dependencies.get_db),
-                       current_user: models.Usuario = Depends(dependencies.get_current_user)):
-    query = db.query(models.Pedido).options(joinedload(models.Pedido.detalles), joinedload(models.Pedido.pagos))
+                       view: Literal["full", "summary"] = "full",
+                       db: AsyncSession = Depends(dependencies.get_db),
+                       current_user: dependencies.Principal = Depends(dependencies.get_current_user)):
+    query = select(*COLUMNAS_RESUMEN)
+    if current_user.rol != models.RolEnum.admin:
+        query = query.where(models.Pedido.id_usuario == current_user.id_usuario)
+    query = query.order_by(models.Pedido.fecha_hora.desc(), models.Pedido.id_pedido.desc())
+    cabeceras = leer(CabeceraFila, await db.execute(query.offset(skip).limit(limit)))
+    # Se serializa directamente a bytes con el TypeAdapter del esquema (ver app/responses.py)
+    if view == "summary":
+        return json_response(resumen_adapter, cabeceras)
+    return json_response(pedidos_adapter, await con_lineas(db, cabeceras))
+
+# Listar pedidos con paginación por cursor sobre (fecha_hora, id_pedido), del más reciente al más antiguo
+@router.get("/pagina", response_model=schemas.PedidoPage)
+@query_budget(4)
+async def read_pedidos_pagina(cursor: Optional[str] = None,
+                              limit: int = Query(50, ge=1, le=500),
+                              desde: Optional[datetime] = None,
+                              hasta: Optional[datetime] = None,
+                              db: AsyncSession = Depends(dependencies.get_db),
+                              current_user: dependencies.Principal = Depends(dependencies.get_current_user)):
+    clave = tuple_(models.Pedido.fecha_hora, models.Pedido.id_pedido)
+    query = select(*COLUMNAS_RESUMEN)
     if current_user.rol != models.RolEnum.admin:
-        query = query.filter(models.Pedido.id_usuario == current_user.id_usuario)
-    pedidos = query.offset(skip).limit(limit).all()
-    return pedidos
+        query = query.where(models.Pedido.id_usuario == current_user.id_usuario)
+    if desde is not None:
+        query = query.where(models.Pedido.fecha_hora >= desde)
+    if hasta is not None:
+        query = query.where(models.Pedido.fecha_hora < hasta)
+
+    posicion = None
+    if cursor is not None:
+        try:
+            posicion = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+    hacia_atras = posicion is not None and posicion.direccion == "p"
+    if posicion is not None:
+        punto = tuple_(posicion.fecha_hora, posicion.id_pedido)
+        query = query.where(clave > punto if hacia_atras else clave < punto)
+    if hacia_atras:
+        query = query.order_by(models.Pedido.fecha_hora.asc(), models.Pedido.id_pedido.asc())
+    else:
+        query = query.order_by(models.Pedido.fecha_hora.desc(), models.Pedido.id_pedido.desc())
+
+    # Se pide una fila de más para saber si hay otra página en esa dirección; sus líneas no se cargan
+    result = await db.execute(query.limit(limit + 1))
+    cabeceras = leer(CabeceraFila, result)
+    hay_mas = len(cabeceras) > limit
+    cabeceras = cabeceras[:limit]
+    if hacia_atras:
+        cabeceras.reverse()
+    pedidos = await con_lineas(db, cabeceras)
+
+    # Hacia delante hay anterior si se llegó con cursor; hacia atrás siempre hay siguiente
+    tiene_siguiente = hay_mas or hacia_atras
+    tiene_anterior = hay_mas if hacia_atras else posicion is not None
+    next_cursor = prev_cursor = None
+    if pedidos:
+        primero, ultimo = pedidos[0], pedidos[-1]
+        if tiene_siguiente:
+            next_cursor = encode_cursor("n", ultimo.fecha_hora, ultimo.id_pedido)
+        if tiene_anterior:
+            prev_cursor = encode_cursor("p", primero.fecha_hora, primero.id_pedido)
+    return json_response(pagina_adapter, {"items": pedidos, "next_cursor": next_cursor, "prev_cursor": prev_cursor})
+
+# Exportar todos los pedidos de un rango [desde, hasta) con detalles y pagos (solo admin).
+# Se transmite por particiones mientras se lee: memoria constante y el cliente puede cortar cuando quiera.
+@router.get("/export")
+async def export_pedidos(desde: datetime, hasta: datetime,
+                         formato: Literal["csv", "ndjson"] = "csv",
+                         admin: dependencies.Principal = Depends(dependencies.get_current_admin)):
+    if hasta <= desde:
+        raise HTTPException(status_code=400, detail="'hasta' debe ser posterior a 'desde'")
+    generar, media_type = export.FORMATOS[formato]
+    nombre = f"pedidos_{desde:%Y%m%d}_{hasta:%Y%m%d}.{formato}"
+    return StreamingResponse(generar(desde, hasta), media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{nombre}"'})
+
+# ETag de un pedido: cambia con el estado, el total y el número de detalles y pagos
+def etag_pedido(id_pedido: int, estado, total: float, n_detalles: int, n_pagos: int) -> str:
+    return make_etag("pedido", id_pedido, getattr(estado, "value", estado), total, n_detalles, n_pagos)
+
+# Pedidos cerrados o cancelados ya no cambian: se guarda su PedidoOut serializado junto al dueño
+PEDIDOS_CACHE_MAX_BYTES = int(os.getenv("PEDIDOS_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+pedidos_finalizados = ByteLRUCache(max_bytes=PEDIDOS_CACHE_MAX_BYTES)
+
+class PedidoCacheado(NamedTuple):
+    id_usuario: int
+    body: bytes
+    etag: str
+
+# Serializar un pedido finalizado (con detalles y pagos cargados) y guardarlo en la caché
+def cachear_pedido_finalizado(pedido: models.Pedido) -> PedidoCacheado:
+    body = dump_json(pedido_adapter, pedido)
+    entrada = PedidoCacheado(pedido.id_usuario, body,
+                             etag_pedido(pedido.id_pedido, pedido.estado, pedido.total,
+                                         len(pedido.detalles), len(pedido.pagos)))
+    pedidos_finalizados.set(pedido.id_pedido, entrada, len(body))
+    return entrada
+
+def respuesta_cacheada(entrada: PedidoCacheado, if_none_match: Optional[str]) -> Response:
+    if etag_matches(if_none_match, entrada.etag):
+        return not_modified(entrada.etag)
+    return Response(content=entrada.body, media_type="application/json", headers={"ETag": entrada.etag})
 
 # Ver un pedido específico
 @router.get("/{pedido_id}", response_model=schemas.PedidoOut)
+@query_budget(3)
 async def read_pedido(pedido_id: int,
-                      db: Session = Depends(dependencies.get_db),
-                      current_user: models.Usuario = Depends(dependencies.get_current_user)):
-    pedido = db.query(models.Pedido).filter(models.Pedido.id_pedido == pedido_id)\
-        .options(joinedload(models.Pedido.detalles), joinedload(models.Pedido.pagos)).first()
+                      if_none_match: Optional[str] = Header(None),
+                      db: AsyncSession = Depends(dependencies.get_db),
+                      current_user: dependencies.Principal = Depends(dependencies.get_current_user)):
+    entrada = pedidos_finalizados.get(pedido_id)
+    if entrada is not None:
+        # El permiso se sigue comprobando, contra el dueño guardado en la caché
+        if current_user.rol != models.RolEnum.admin and entrada.id_usuario != current_user.id_usuario:
+            raise HTTPException(status_code=403, detail="No tienes permiso para ver este pedido")
+        return respuesta_cacheada(entrada, if_none_match)
+
+    if if_none_match:
+        # Revalidación: una sola fila con el estado y los conteos, sin cargar ni serializar el pedido
+        n_detalles = select(func.count()).where(models.DetallePedido.id_pedido == models.Pedido.id_pedido).scalar_subquery()
+        n_pagos = select(func.count()).where(models.Pago.id_pedido == models.Pedido.id_pedido).scalar_subquery()
+        result = await db.execute(
+            select(models.Pedido.id_usuario, models.Pedido.estado, models.Pedido.total,
+                   n_detalles.label("n_detalles"), n_pagos.label("n_pagos"))
+            .where(models.Pedido.id_pedido == pedido_id)
+        )
+        fila = result.first()
+        if fila is None:
+            raise HTTPException(status_code=404, detail="Pedido no encontrado")
+        if current_user.rol != models.RolEnum.admin and fila.id_usuario != current_user.id_usuario:
+            raise HTTPException(status_code=403, detail="No tienes permiso para ver este pedido")
+        etag = etag_pedido(pedido_id, fila.estado, fila.total, fila.n_detalles, fila.n_pagos)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+    pedido = await get_pedido_completo(db, pedido_id)
     if not pedido:
         raise HTTPException(status_code=404, detail="Pedido no encontrado")
     # Empleado solo puede ver sus pedidos
     if current_user.rol != models.RolEnum.admin and pedido.id_usuario != current_user.id_usuario:
         raise HTTPException(status_code=403, detail="No tienes permiso para ver este pedido")
+    if pedido.estado != models.EstadoPedidoEnum.abierto:
+        return respuesta_cacheada(cachear_pedido_finalizado(pedido), None)
+    # Mismo serializador que los finalizados: el JSON (fechas incluidas) no cambia de forma al cerrarlo
+    etag = etag_pedido(pedido.id_pedido, pedido.estado, pedido.total, len(pedido.detalles), len(pedido.pagos))
+    return json_response(pedido_adapter, pedido, headers={"ETag": etag})
+
+# Transición atómica de un pedido abierto: UPDATE ... WHERE estado='abierto' [AND id_usuario=:uid] RETURNING.
+# Un solo viaje a la BD y sin carrera entre dos terminales: solo una de las dos ve la fila abierta.
+# Sin nuevo_estado solo bloquea la fila (SET estado = estado) para validar que sigue abierta;
+# valores son otras columnas a actualizar en el mismo UPDATE (el total al agregar líneas).
+async def transicion_pedido(db: AsyncSession, pedido_id: int, current_user: dependencies.Principal,
+                            nuevo_estado: Optional[str] = None, **valores):
+    stmt = update(models.Pedido).where(models.Pedido.id_pedido == pedido_id, models.Pedido.estado == "abierto")
+    if current_user.rol != models.RolEnum.admin:
+        stmt = stmt.where(models.Pedido.id_usuario == current_user.id_usuario)
+    stmt = stmt.values(estado=nuevo_estado if nuevo_estado is not None else models.Pedido.estado, **valores)
+    return await db.scalar(stmt.returning(models.Pedido), execution_options={"synchronize_session": False})
+
+# Solo en el camino de error: averiguar por qué no se aplicó la transición
+async def rechazar_transicion(db: AsyncSession, pedido_id: int, current_user: dependencies.Principal,
+                              detalle_permiso: str, detalle_estado: str):
+    result = await db.execute(
+        select(models.Pedido.id_usuario, models.Pedido.estado).where(models.Pedido.id_pedido == pedido_id)
+    )
+    fila = result.first()
+    if fila is None:
+        raise HTTPException(status_code=404, detail="Pedido no encontrado")
+    if current_user.rol != models.RolEnum.admin and fila.id_usuario != current_user.id_usuario:
+        raise HTTPException(status_code=403, detail=detalle_permiso)
+    raise HTTPException(status_code=400, detail=detalle_estado)
+
+# Cargar detalles y pagos de un pedido ya obtenido (antes del commit, dentro de la misma transacción)
+async def cargar_relaciones(db: AsyncSession, pedido: models.Pedido):
+    detalles = await db.scalars(select(models.DetallePedido).where(models.DetallePedido.id_pedido == pedido.id_pedido))
+    pagos = await db.scalars(select(models.Pago).where(models.Pago.id_pedido == pedido.id_pedido))
+    set_committed_value(pedido, "detalles", detalles.all())
+    set_committed_value(pedido, "pagos", pagos.all())
     return pedido
 
+# Liberar la mesa del pedido si no le queda ningún otro abierto (misma transacción que la transición)
+async def liberar_mesa(db: AsyncSession, pedido: models.Pedido):
+    if pedido.id_mesa is None:
+        return
+    otro_abierto = (select(models.Pedido.id_pedido)
+                    .where(models.Pedido.id_mesa == pedido.id_mesa, models.Pedido.estado == "abierto").exists())
+    await db.execute(
+        update(models.Mesa).where(models.Mesa.id_mesa == pedido.id_mesa, ~otro_abierto).values(estado="libre"),
+        execution_options={"synchronize_session": False},
+    )
+
+# Agregar productos a un pedido abierto - el mismo empleado o admin
+@router.post("/{pedido_id}/detalles", response_model=schemas.PedidoOut)
+@query_budget(6)
+async def agregar_detalles(pedido_id: int,
+                           detalles: List[schemas.DetallePedidoBase],
+                           db: AsyncSession = Depends(dependencies.get_db),
+                           current_user: dependencies.Principal = Depends(dependencies.get_current_user)):
+    if not detalles:
+        raise HTTPException(status_code=400, detail="No hay productos que agregar")
+    cantidades, productos = await resolver_lineas(db, detalles)
+    extra = sum(productos[id_producto].precio * cantidad for id_producto, cantidad in cantidades.items())
+    # Sumar al total en el mismo UPDATE que valida (y bloquea) que el pedido sigue abierto
+    pedido = await transicion_pedido(db, pedido_id, current_user, total=models.Pedido.total + extra)
+    if pedido is None:
+        await rechazar_transicion(db, pedido_id, current_user, "No puedes modificar un pedido que no te pertenece",
+                                  "Solo se pueden agregar productos a un pedido abierto")
+    nuevos = await insertar_detalles(db, pedido_id, cantidades, productos)
+    await cargar_relaciones(db, pedido)
+    await db.commit()
+    publicar_pedido(events.PEDIDO_DETALLES_AGREGADOS, pedido, nuevos, productos)
+    return json_response(pedido_adapter, pedido)
+
 # Cerrar pedido (cambiar estado a cerrado) - el mismo empleado o admin
 @router.put("/{pedido_id}/cerrar", response_model=schemas.PedidoOut)
+@query_budget(7)
 async def cerrar_pedido(pedido_id: int,
-                        db: Session = Depends(dependencies.get_db),
-                        current_user: models.Usuario = Depends(dependencies.get_current_user)):
-    pedido = db.query(models.Pedido).filter(models.Pedido.id_pedido == pedido_id).first()
-    if not pedido:
-        raise HTTPException(status_code=404, detail="Pedido no encontrado")
-    if current_user.rol != models.RolEnum.admin and pedido.id_usuario != current_user.id_usuario:
-        raise HTTPException(status_code=403, detail="No puedes cerrar un pedido que no te pertenece")
-    if pedido.estado != "abierto":
-        raise HTTPException(status_code=400, detail="El pedido no está abierto")
-    pedido.estado = "cerrado"
-    db.commit()
-    db.refresh(pedido)
-    return pedido
+                        db: AsyncSession = Depends(dependencies.get_db),
+                        current_user: dependencies.Principal = Depends(dependencies.get_current_user)):
+    pedido = await transicion_pedido(db, pedido_id, current_user, "cerrado")
+    if pedido is None:
+        await rechazar_transicion(db, pedido_id, current_user,
+                                  "No puedes cerrar un pedido que no te pertenece", "El pedido no está abierto")
+    await cargar_relaciones(db, pedido)
+    await rollup.registrar_cierre(db, pedido)
+    await liberar_mesa(db, pedido)
+    await db.commit()
+    publicar_pedido(events.PEDIDO_CERRADO, pedido)
+    return respuesta_cacheada(cachear_pedido_finalizado(pedido), None)
+
+# Cancelar pedido (cambiar estado a cancelado) - el mismo empleado o admin
+@router.put("/{pedido_id}/cancelar", response_model=schemas.PedidoOut)
+@query_budget(6)
+async def cancelar_pedido(pedido_id: int,
+                          db: AsyncSession = Depends(dependencies.get_db),
+                          current_user: dependencies.Principal = Depends(dependencies.get_current_user)):
+    pedido = await transicion_pedido(db, pedido_id, current_user, "cancelado")
+    if pedido is None:
+        await rechazar_transicion(db, pedido_id, current_user,
+                                  "No puedes cancelar un pedido que no te pertenece", "El pedido no está abierto")
+    await cargar_relaciones(db, pedido)
+    await rollup.registrar_cancelacion(db, pedido)
+    await liberar_mesa(db, pedido)
+    await db.commit()
+    publicar_pedido(events.PEDIDO_CANCELADO, pedido)
+    return respuesta_cacheada(cachear_pedido_finalizado(pedido), None)
 
 # Agregar pago a un pedido (empleado o admin)
 @router.post("/{pedido_id}/pagos", response_model=schemas.PagoOut, status_code=status.HTTP_201_CREATED)
+@query_budget(4)
 async def create_pago(pedido_id: int,
                       pago: schemas.PagoCreate,
-                      db: Session = Depends(dependencies.get_db),
-                      current_user: models.Usuario = Depends(dependencies.get_current_user)):
-    # Verificar que el pedido existe y pertenece al usuario si es empleado
-    pedido = db.query(models.Pedido).filter(models.Pedido.id_pedido == pedido_id).first()
-    if not pedido:
-        raise HTTPException(status_code=404, detail="Pedido no encontrado")
-    if current_user.rol != models.RolEnum.admin and pedido.id_usuario != current_user.id_usuario:
-        raise HTTPException(status_code=403, detail="No puedes agregar pago a este pedido")
-    if pedido.estado != "abierto":
-        raise HTTPException(status_code=400, detail="No se pueden agregar pagos a un pedido cerrado o cancelado")
-
-    db_pago = models.Pago(
-        id_pedido=pedido_id,
-        metodo_pago=pago.metodo_pago.value,
-        monto=pago.monto
+                      db: AsyncSession = Depends(dependencies.get_db),
+                      current_user: dependencies.Principal = Depends(dependencies.get_current_user)):
+    # Verificar y bloquear en un solo UPDATE que el pedido sigue abierto y pertenece al usuario si es empleado;
+    # un cierre concurrente espera a que este pago se confirme
+    pedido = await transicion_pedido(db, pedido_id, current_user)
+    if pedido is None:
+        await rechazar_transicion(db, pedido_id, current_user, "No puedes agregar pago a este pedido",
+                                  "No se pueden agregar pagos a un pedido cerrado o cancelado")
+
+    db_pago = await db.scalar(
+        insert(models.Pago)
+        .values(id_pedido=pedido_id, metodo_pago=pago.metodo_pago.value, monto=pago.monto)
+        .returning(models.Pago)
     )
-    db.add(db_pago)
     # Opcional: actualizar total pagado? (lo dejamos simple)
-    db.commit()
-    db.refresh(db_pago)
-    return db_pago
\ No newline at end of file
+    await rollup.registrar_pago(db, db_pago)
+    await db.commit()
+    pubsub.emitir(events.PAGO_REGISTRADO,
+                  {"id_pago": db_pago.id_pago, "id_pedido": pedido_id, "metodo_pago": db_pago.metodo_pago,
+                   "monto": db_pago.monto, "fecha_hora": db_pago.fecha_hora},
+                  id_usuario=pedido.id_usuario)
+    return db_pago
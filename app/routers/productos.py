@@ -1,64 +1,126 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from .. import models, schemas, dependencies
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from .. import models, schemas, dependencies, pubsub
+from ..responses import dump_json, producto_adapter, productos_adapter
+from ..cache import VersionedCache
+from ..filas import leer, tipo_fila
+from ..querybudget import query_budget
+from ..etags import etag_matches, make_etag, not_modified
+import os
 
 router = APIRouter(prefix="/productos", tags=["Productos"])
 
-# Ver todos los productos (activos)
+# Caché del menú: (JSON ya serializado, ETag) por (skip, limit, categoria) y por producto,
+# invalidada al cambiar cualquier producto
+MENU_CACHE_SIZE = int(os.getenv("MENU_CACHE_SIZE", 256))
+menu_cache = VersionedCache(maxsize=MENU_CACHE_SIZE)
+
+# Columnas de ProductoOut: el menú se lee con filas de Core, sin entidades ORM ni identity map
+COLUMNAS_PRODUCTO = (
+    models.Producto.id_producto, models.Producto.nombre, models.Producto.descripcion, models.Producto.precio,
+    models.Producto.categoria, models.Producto.activo, models.Producto.fecha_creacion,
+)
+ProductoFila = tipo_fila("ProductoFila", COLUMNAS_PRODUCTO)
+
+# Un cambio de producto en cualquier worker invalida el menú de todos (ver app/pubsub.py)
+PRODUCTO_MODIFICADO = "producto.modificado"
+
+@pubsub.al_recibir(PRODUCTO_MODIFICADO)
+def _producto_modificado(mensaje: pubsub.Mensaje):
+    menu_cache.bump()
+
+pubsub.al_recargar(menu_cache.bump)
+
+# La ETag se deriva del cuerpo cacheado: igual en todos los workers para el mismo menú
+def respuesta_menu(entrada, if_none_match: Optional[str]) -> Response:
+    body, etag = entrada
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+# Ver todos los productos (activos); se sirven los bytes cacheados sin pasar por la BD ni por pydantic
 @router.get("/", response_model=List[schemas.ProductoOut])
-async def read_productos(skip: int = 0, limit: int = 100,
-                         db: Session = Depends(dependencies.get_db),
-                         current_user: models.Usuario = Depends(dependencies.get_current_user)):
-    productos = db.query(models.Producto).filter(models.Producto.activo == True).offset(skip).limit(limit).all()
-    return productos
+@query_budget(2)
+async def read_productos(skip: int = 0, limit: int = 100, categoria: Optional[str] = None,
+                         if_none_match: Optional[str] = Header(None),
+                         db: AsyncSession = Depends(dependencies.get_db),
+                         current_user: dependencies.Principal = Depends(dependencies.get_current_user)):
+    clave = (skip, limit, categoria)
+    version = menu_cache.version
+    entrada = menu_cache.get(clave)
+    if entrada is None:
+        query = select(*COLUMNAS_PRODUCTO).where(models.Producto.activo == True)
+        if categoria is not None:
+            query = query.where(models.Producto.categoria == categoria)
+        result = await db.execute(query.order_by(models.Producto.id_producto).offset(skip).limit(limit))
+        body = dump_json(productos_adapter, leer(ProductoFila, result))
+        entrada = (body, make_etag(body))
+        menu_cache.set(clave, version, entrada)
+    return respuesta_menu(entrada, if_none_match)
 
 # Ver un producto por ID
 @router.get("/{producto_id}", response_model=schemas.ProductoOut)
+@query_budget(2)
 async def read_producto(producto_id: int,
-                        db: Session = Depends(dependencies.get_db),
-                        current_user: models.Usuario = Depends(dependencies.get_current_user)):
-    producto = db.query(models.Producto).filter(models.Producto.id_producto == producto_id).first()
-    if not producto or not producto.activo:
-        raise HTTPException(status_code=404, detail="Producto no encontrado")
-    return producto
+                        if_none_match: Optional[str] = Header(None),
+                        db: AsyncSession = Depends(dependencies.get_db),
+                        current_user: dependencies.Principal = Depends(dependencies.get_current_user)):
+    clave = ("producto", producto_id)
+    version = menu_cache.version
+    entrada = menu_cache.get(clave)
+    if entrada is None:
+        producto = await db.scalar(select(models.Producto).where(models.Producto.id_producto == producto_id))
+        if not producto or not producto.activo:
+            raise HTTPException(status_code=404, detail="Producto no encontrado")
+        body = dump_json(producto_adapter, producto)
+        entrada = (body, make_etag(body))
+        menu_cache.set(clave, version, entrada)
+    return respuesta_menu(entrada, if_none_match)
 
 # Crear producto (solo admin)
 @router.post("/", response_model=schemas.ProductoOut, status_code=status.HTTP_201_CREATED)
+@query_budget(3)
 async def create_producto(producto: schemas.ProductoCreate,
-                          db: Session = Depends(dependencies.get_db),
-                          admin: models.Usuario = Depends(dependencies.get_current_admin)):
+                          db: AsyncSession = Depends(dependencies.get_db),
+                          admin: dependencies.Principal = Depends(dependencies.get_current_admin)):
     db_producto = models.Producto(**producto.model_dump())
     db.add(db_producto)
-    db.commit()
-    db.refresh(db_producto)
+    await db.commit()
+    pubsub.emitir(PRODUCTO_MODIFICADO, {"id_producto": db_producto.id_producto})
+    await db.refresh(db_producto)
     return db_producto
 
 # Actualizar producto (solo admin)
 @router.put("/{producto_id}", response_model=schemas.ProductoOut)
+@query_budget(4)
 async def update_producto(producto_id: int,
                           producto_update: schemas.ProductoUpdate,
-                          db: Session = Depends(dependencies.get_db),
-                          admin: models.Usuario = Depends(dependencies.get_current_admin)):
-    db_producto = db.query(models.Producto).filter(models.Producto.id_producto == producto_id).first()
+                          db: AsyncSession = Depends(dependencies.get_db),
+                          admin: dependencies.Principal = Depends(dependencies.get_current_admin)):
+    db_producto = await db.scalar(select(models.Producto).where(models.Producto.id_producto == producto_id))
     if not db_producto:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
     
     for field, value in producto_update.model_dump(exclude_unset=True).items():
         setattr(db_producto, field, value)
     
-    db.commit()
-    db.refresh(db_producto)
+    await db.commit()
+    pubsub.emitir(PRODUCTO_MODIFICADO, {"id_producto": db_producto.id_producto})
+    await db.refresh(db_producto)
     return db_producto
 
 # Eliminar producto (solo admin) - borrado lógico (desactivar)
 @router.delete("/{producto_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(3)
 async def delete_producto(producto_id: int,
-                          db: Session = Depends(dependencies.get_db),
-                          admin: models.Usuario = Depends(dependencies.get_current_admin)):
-    db_producto = db.query(models.Producto).filter(models.Producto.id_producto == producto_id).first()
+                          db: AsyncSession = Depends(dependencies.get_db),
+                          admin: dependencies.Principal = Depends(dependencies.get_current_admin)):
+    db_producto = await db.scalar(select(models.Producto).where(models.Producto.id_producto == producto_id))
     if not db_producto:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
     db_producto.activo = False
-    db.commit()
+    await db.commit()
+    pubsub.emitir(PRODUCTO_MODIFICADO, {"id_producto": producto_id})
     return None
\ No newline at end of file
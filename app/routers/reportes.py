@@ -0,0 +1,137 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import Integer, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal
+from datetime import datetime
+from .. import models, schemas, dependencies, rollup
+
+router = APIRouter(prefix="/reportes", tags=["Reportes"])
+
+# Los reportes leen ventas_rollup (app/rollup.py), no detalle_pedido: el coste depende del
+# número de periodos del rango, no del número de pedidos.
+R = models.VentasRollup
+
+# Rango [desde, hasta) obligatorio
+class Rango:
+    def __init__(self, desde: datetime, hasta: datetime):
+        if hasta <= desde:
+            raise HTTPException(status_code=400, detail="'hasta' debe ser posterior a 'desde'")
+        self.desde, self.hasta = desde, hasta
+
+# Periodos de una dimensión dentro del rango: por día si el rango cae en días completos,
+# si no por hora (se incluyen las horas que empiezan dentro del rango). Una fila diaria
+# cubre el día entero, así que "dia" solo se respeta si los dos extremos caen a medianoche.
+def filtro_rollup(db: AsyncSession, rango: Rango, dimension: str, granularidad: str = None):
+    dialect = rollup.dialecto(db)
+    desde, hasta = rollup.a_local(rango.desde, dialect), rollup.a_local(rango.hasta, dialect)
+    dias_completos = rollup.inicio_periodo(desde, "dia") == desde and rollup.inicio_periodo(hasta, "dia") == hasta
+    if granularidad is None or not dias_completos:
+        granularidad = "dia" if dias_completos else "hora"
+    return (R.granularidad == granularidad, R.dimension == dimension, R.periodo >= desde, R.periodo < hasta)
+
+# Ventas por día u hora
+@router.get("/ventas", response_model=List[schemas.VentasPeriodo])
+async def ventas_por_periodo(agrupar: Literal["dia", "hora"] = "dia",
+                             rango: Rango = Depends(),
+                             db: AsyncSession = Depends(dependencies.get_db),
+                             admin: dependencies.Principal = Depends(dependencies.get_current_admin)):
+    result = await db.execute(
+        select(R.periodo, R.pedidos, R.ventas)
+        .where(*filtro_rollup(db, rango, "total", agrupar))
+        .order_by(R.periodo)
+    )
+    # Con días incompletos llegan filas por hora: se suman por día (los extremos quedan parciales)
+    periodos = {}
+    for periodo, pedidos, ventas in result:
+        periodo = rollup.inicio_periodo(periodo, agrupar)
+        fila = periodos.setdefault(periodo, {"periodo": periodo, "pedidos": 0, "ventas": 0.0})
+        fila["pedidos"] += pedidos
+        fila["ventas"] += ventas
+    return list(periodos.values())
+
+# Ventas por producto, de más a menos vendido
+@router.get("/productos", response_model=List[schemas.VentasProducto])
+async def ventas_por_producto(limit: int = Query(50, ge=1, le=1000),
+                              rango: Rango = Depends(),
+                              db: AsyncSession = Depends(dependencies.get_db),
+                              admin: dependencies.Principal = Depends(dependencies.get_current_admin)):
+    ventas = func.sum(R.ventas).label("ventas")
+    agregado = (
+        select(R.clave, func.sum(R.unidades).label("unidades"), ventas)
+        .where(*filtro_rollup(db, rango, "producto"))
+        .group_by(R.clave)
+        .order_by(ventas.desc()).limit(limit)
+        .subquery()
+    )
+    # El nombre y la categoría se añaden después de agrupar, solo a las filas devueltas
+    result = await db.execute(
+        select(models.Producto.id_producto, models.Producto.nombre, models.Producto.categoria,
+               agregado.c.unidades, agregado.c.ventas)
+        .join(agregado, models.Producto.id_producto == cast(agregado.c.clave, Integer))
+        .order_by(agregado.c.ventas.desc())
+    )
+    return result.mappings().all()
+
+# Ventas por categoría de producto
+@router.get("/categorias", response_model=List[schemas.VentasCategoria])
+async def ventas_por_categoria(rango: Rango = Depends(),
+                               db: AsyncSession = Depends(dependencies.get_db),
+                               admin: dependencies.Principal = Depends(dependencies.get_current_admin)):
+    ventas = func.sum(R.ventas).label("ventas")
+    result = await db.execute(
+        select(R.clave, func.sum(R.unidades).label("unidades"), ventas)
+        .where(*filtro_rollup(db, rango, "categoria"))
+        .group_by(R.clave)
+        .order_by(ventas.desc())
+    )
+    return [{"categoria": fila.clave or None, "unidades": fila.unidades, "ventas": fila.ventas} for fila in result]
+
+# Lo cobrado por método de pago, por fecha del pago (sin los pedidos cancelados)
+@router.get("/metodos-pago", response_model=List[schemas.VentasMetodoPago])
+async def ventas_por_metodo_pago(rango: Rango = Depends(),
+                                 db: AsyncSession = Depends(dependencies.get_db),
+                                 admin: dependencies.Principal = Depends(dependencies.get_current_admin)):
+    monto = func.sum(R.ventas).label("monto")
+    result = await db.execute(
+        select(R.clave.label("metodo_pago"), func.sum(R.pedidos).label("pagos"), monto)
+        .where(*filtro_rollup(db, rango, "metodo_pago"))
+        .group_by(R.clave)
+        .having(func.sum(R.pedidos) != 0)
+        .order_by(monto.desc())
+    )
+    return result.mappings().all()
+
+# Ventas y ticket promedio por empleado
+@router.get("/empleados", response_model=List[schemas.VentasEmpleado])
+async def ventas_por_empleado(rango: Rango = Depends(),
+                              db: AsyncSession = Depends(dependencies.get_db),
+                              admin: dependencies.Principal = Depends(dependencies.get_current_admin)):
+    agregado = (
+        select(R.clave, func.sum(R.pedidos).label("pedidos"), func.sum(R.ventas).label("ventas"))
+        .where(*filtro_rollup(db, rango, "empleado"))
+        .group_by(R.clave)
+        .subquery()
+    )
+    result = await db.execute(
+        select(models.Usuario.id_usuario, models.Usuario.nombre_completo, agregado.c.pedidos, agregado.c.ventas)
+        .join(agregado, models.Usuario.id_usuario == cast(agregado.c.clave, Integer))
+        .order_by(agregado.c.ventas.desc())
+    )
+    return [{**fila, "ticket_promedio": fila["ventas"] / fila["pedidos"] if fila["pedidos"] else 0.0}
+            for fila in result.mappings()]
+
+# Totales del rango: pedidos cerrados, ventas, ticket promedio y cancelados
+@router.get("/resumen", response_model=schemas.ResumenVentas)
+async def resumen_ventas(rango: Rango = Depends(),
+                         db: AsyncSession = Depends(dependencies.get_db),
+                         admin: dependencies.Principal = Depends(dependencies.get_current_admin)):
+    granularidad, _, desde, hasta = filtro_rollup(db, rango, "total")
+    result = await db.execute(
+        select(R.dimension, func.sum(R.pedidos), func.sum(R.ventas))
+        .where(granularidad, R.dimension.in_(("total", "cancelados")), desde, hasta)
+        .group_by(R.dimension)
+    )
+    totales = {dimension: (pedidos, ventas) for dimension, pedidos, ventas in result}
+    pedidos, ventas = totales.get("total", (0, 0.0))
+    return {"pedidos": pedidos, "ventas": ventas, "ticket_promedio": ventas / pedidos if pedidos else 0.0,
+            "cancelados": totales.get("cancelados", (0, 0.0))[0]}
@@ -40,6 +40,7 @@ class UsuarioUpdate(BaseModel):
     activo: Optional[bool] = None
 
 class UsuarioOut(UsuarioBase):
+    email: str  # ya validado al guardarlo; EmailStr en la salida costaría más que todo lo demás
     id_usuario: int
     activo: bool
     fecha_creacion: datetime
@@ -89,6 +90,18 @@ class MesaOut(MesaBase):
     class Config:
         from_attributes = True
 
+# Plano de sala: estado de cada mesa con sus pedidos abiertos
+class PedidoEnMesa(BaseModel):
+    id_pedido: int
+    total: float
+
+class MesaTablero(BaseModel):
+    id_mesa: int
+    numero_mesa: int
+    estado: EstadoMesaEnum
+    pedidos: List[PedidoEnMesa] = []
+    total: float = 0.0
+
 # Detalle de pedido (para usar dentro de PedidoCreate)
 class DetallePedidoBase(BaseModel):
     id_producto: int
@@ -125,6 +138,17 @@ class PedidoOut(PedidoBase):
     class Config:
         from_attributes = True
 
+# Solo la cabecera del pedido (listados para dashboards)
+class PedidoResumen(PedidoBase):
+    id_pedido: int
+    id_usuario: int
+    fecha_hora: datetime
+    total: float
+    estado: EstadoPedidoEnum
+
+    class Config:
+        from_attributes = True
+
 # Pagos
 class PagoBase(BaseModel):
     metodo_pago: MetodoPagoEnum
@@ -145,6 +169,48 @@ class PagoOut(PagoBase):
 PedidoOut.model_rebuild()
 PagoOut.model_rebuild()
 
+# Página de pedidos con cursores opacos (paginación por keyset)
+class PedidoPage(BaseModel):
+    items: List[PedidoOut]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+# Reportes de ventas (solo pedidos cerrados)
+class VentasPeriodo(BaseModel):
+    periodo: datetime
+    pedidos: int
+    ventas: float
+
+class VentasProducto(BaseModel):
+    id_producto: int
+    nombre: str
+    categoria: Optional[str] = None
+    unidades: int
+    ventas: float
+
+class VentasCategoria(BaseModel):
+    categoria: Optional[str] = None
+    unidades: int
+    ventas: float
+
+class VentasMetodoPago(BaseModel):
+    metodo_pago: MetodoPagoEnum
+    pagos: int
+    monto: float
+
+class VentasEmpleado(BaseModel):
+    id_usuario: int
+    nombre_completo: str
+    pedidos: int
+    ventas: float
+    ticket_promedio: float
+
+class ResumenVentas(BaseModel):
+    pedidos: int
+    ventas: float
+    ticket_promedio: float
+    cancelados: int
+
 # Token
 class Token(BaseModel):
     access_token: str
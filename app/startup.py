@@ -0,0 +1,90 @@
+import logging
+import os
+from contextlib import AsyncExitStack
+from pathlib import Path
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError, ProgrammingError, SQLAlchemyError
+from .database import ASYNC_SQLALCHEMY_DATABASE_URL, async_engine, AsyncSessionLocal, Base
+from . import pubsub
+from .tablero import tablero
+
+logger = logging.getLogger(__name__)
+
+# Opciones de arranque
+DB_CREATE_ALL = os.getenv("DB_CREATE_ALL", "false").lower() in ("1", "true", "yes")  # solo desarrollo
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", 0))  # conexiones a abrir antes de servir
+SCHEMA_CHECK = os.getenv("SCHEMA_CHECK", "warn")  # "strict", "warn" u "off"
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+# Revisión(es) head de las migraciones (alembic se importa solo aquí)
+def alembic_heads() -> set:
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    return set(ScriptDirectory.from_config(config).get_heads())
+
+async def create_all():
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+# Abrir N conexiones a la vez para que el pool ya esté lleno al recibir tráfico
+async def warm_up_pool(connections: int):
+    async with AsyncExitStack() as stack:
+        for _ in range(connections):
+            conn = await stack.enter_async_context(async_engine.connect())
+            await conn.execute(text("SELECT 1"))
+    logger.info("Pool precalentado con %d conexiones", connections)
+
+# Comparar alembic_version con el head de las migraciones. Sin la tabla, la BD nunca se migró:
+# se comprueba antes de leerla porque cada motor lo señala con una excepción distinta
+# (ProgrammingError en PostgreSQL, OperationalError en SQLite, igual que una BD caída).
+async def check_schema_version(mode: str):
+    if mode == "off":
+        return
+    heads = alembic_heads()
+    try:
+        async with async_engine.connect() as conn:
+            if await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table("alembic_version")):
+                result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+                current = {row[0] for row in result}
+            else:
+                current = set()
+    except ProgrammingError:
+        current = set()  # la BD nunca se migró con Alembic
+    except (OperationalError, OSError) as exc:
+        # BD inaccesible momentáneamente: no tumbar el worker (evita el crash loop), solo avisar
+        logger.warning("No se pudo verificar la versión del esquema: %s", exc.__class__.__name__)
+        return
+    if current != heads:
+        message = f"Esquema en {sorted(current) or 'ninguna revisión'}, se esperaba {sorted(heads)} (ejecuta 'alembic upgrade head')"
+        if mode == "strict":
+            raise SchemaVersionError(message)
+        logger.warning(message)
+
+async def on_startup():
+    if DB_CREATE_ALL:
+        await create_all()
+    if DB_POOL_WARMUP:
+        try:
+            await warm_up_pool(DB_POOL_WARMUP)
+        except (SQLAlchemyError, OSError) as exc:
+            logger.warning("No se pudo precalentar el pool: %s", exc.__class__.__name__)
+    await check_schema_version(SCHEMA_CHECK)
+    # Escuchar a los demás workers antes de cargar cachés: lo que cambie durante la carga llega después
+    await pubsub.bus.iniciar(ASYNC_SQLALCHEMY_DATABASE_URL)
+    # Plano de sala en memoria; si falla, se carga en la primera lectura de /mesas/board
+    try:
+        async with AsyncSessionLocal() as db:
+            await tablero.cargar(db)
+    except (SQLAlchemyError, OSError) as exc:
+        logger.warning("No se pudo cargar el tablero de mesas: %s", exc.__class__.__name__)
+
+async def on_shutdown():
+    await pubsub.bus.detener()
+    await async_engine.dispose()
@@ -0,0 +1,168 @@
+import logging
+import os
+import threading
+import time
+from typing import Optional
+from sqlalchemy import select
+from . import events, models, pubsub
+from .etags import make_etag
+from .responses import dump_json, tablero_adapter
+
+logger = logging.getLogger(__name__)
+
+# Segundos tras los que GET /mesas/board vuelve a leer la BD (0 = nunca). Cada worker tiene su
+# propio tablero y solo ve al momento los cambios que pasan por él; esto acota cuánto puede
+# quedarse atrás respecto a los demás.
+MESAS_BOARD_MAX_AGE = float(os.getenv("MESAS_BOARD_MAX_AGE", 30))
+
+# Mensajes de alta/cambio y baja de mesas (ver app/pubsub.py)
+MESA_GUARDADA = "mesa.guardada"
+MESA_ELIMINADA = "mesa.eliminada"
+
+def _valor(v):
+    return getattr(v, "value", v)
+
+def _fila(id_mesa: int, mesa: dict) -> dict:
+    return {"id_mesa": id_mesa, "numero_mesa": mesa["numero_mesa"], "estado": mesa["estado"],
+            "pedidos": [{"id_pedido": id_pedido, "total": total} for id_pedido, total in mesa["pedidos"].items()],
+            "total": sum(mesa["pedidos"].values())}
+
+# Cada cambio del tablero se emite como evento (fuera del lock)
+def _emitir(fila: dict):
+    events.publicar(events.MESA_ACTUALIZADA, fila)
+
+class TableroMesas:
+    """Plano de sala en memoria: estado de cada mesa y sus pedidos abiertos.
+
+    Se carga una vez de la BD y se actualiza después de cada commit que abre o finaliza un pedido,
+    así que la lectura no toca la BD; el JSON se serializa una vez por cambio.
+    """
+
+    def __init__(self, max_age: float = MESAS_BOARD_MAX_AGE, clock=time.monotonic):
+        self.max_age = max_age
+        self._clock = clock
+        self.version = 0
+        self.cargado_en: Optional[float] = None
+        # id_mesa -> {"numero_mesa", "estado", "pedidos": {id_pedido: total}}
+        self._mesas: dict = {}
+        self._json: Optional[tuple] = None  # (body, etag) de la versión actual
+        self._lock = threading.Lock()
+
+    def vigente(self) -> bool:
+        if self.cargado_en is None:
+            return False
+        return self.max_age <= 0 or self._clock() - self.cargado_en < self.max_age
+
+    # Dos consultas: mesas y pedidos abiertos con mesa. Si algo cambió mientras se leía, se repite.
+    async def cargar(self, db, intentos: int = 3):
+        for _ in range(intentos):
+            version = self.version
+            mesas = await db.execute(select(models.Mesa.id_mesa, models.Mesa.numero_mesa, models.Mesa.estado))
+            nuevas = {id_mesa: {"numero_mesa": numero, "estado": _valor(estado) or "libre", "pedidos": {}}
+                      for id_mesa, numero, estado in mesas}
+            abiertos = await db.execute(
+                select(models.Pedido.id_mesa, models.Pedido.id_pedido, models.Pedido.total)
+                .where(models.Pedido.estado == "abierto", models.Pedido.id_mesa.is_not(None))
+                .order_by(models.Pedido.id_pedido)
+            )
+            for id_mesa, id_pedido, total in abiertos:
+                if id_mesa in nuevas:
+                    nuevas[id_mesa]["pedidos"][id_pedido] = total
+            with self._lock:
+                if version != self.version:
+                    continue
+                self._mesas = nuevas
+                self.cargado_en = self._clock()
+                self._cambio()
+                return
+        logger.warning("Tablero de mesas cargado con cambios concurrentes; se recargará en la próxima lectura")
+        self.cargado_en = None
+
+    def _cambio(self):
+        self.version += 1
+        self._json = None
+
+    # Llamar después del commit del pedido (también al agregarle líneas: cambia su total)
+    def abrir_pedido(self, id_mesa: Optional[int], id_pedido: int, total: float):
+        if id_mesa is None:
+            return
+        with self._lock:
+            mesa = self._mesas.get(id_mesa)
+            if mesa is None:
+                self.cargado_en = None  # mesa creada en otro worker: recargar en la próxima lectura
+                return
+            mesa["pedidos"][id_pedido] = total
+            mesa["estado"] = "ocupada"
+            self._cambio()
+            fila = _fila(id_mesa, mesa)
+        _emitir(fila)
+
+    # Cierre o cancelación: la mesa queda libre cuando no le quedan pedidos abiertos
+    def finalizar_pedido(self, id_mesa: Optional[int], id_pedido: int):
+        if id_mesa is None:
+            return
+        with self._lock:
+            mesa = self._mesas.get(id_mesa)
+            if mesa is None:
+                return
+            mesa["pedidos"].pop(id_pedido, None)
+            if not mesa["pedidos"]:
+                mesa["estado"] = "libre"
+            self._cambio()
+            fila = _fila(id_mesa, mesa)
+        _emitir(fila)
+
+    # Alta o cambio de estado de una mesa (conserva sus pedidos abiertos)
+    def guardar_mesa(self, id_mesa: int, numero_mesa: int, estado):
+        with self._lock:
+            actual = self._mesas.setdefault(id_mesa, {"pedidos": {}})
+            actual["numero_mesa"] = numero_mesa
+            actual["estado"] = _valor(estado) or "libre"
+            self._cambio()
+            fila = _fila(id_mesa, actual)
+        _emitir(fila)
+
+    def quitar_mesa(self, id_mesa: int):
+        with self._lock:
+            if self._mesas.pop(id_mesa, None) is None:
+                return
+            self._cambio()
+        _emitir({"id_mesa": id_mesa, "eliminada": True})
+
+    def serializado(self) -> tuple:
+        with self._lock:
+            if self._json is None:
+                filas = [_fila(id_mesa, mesa)
+                         for id_mesa, mesa in sorted(self._mesas.items(), key=lambda item: item[1]["numero_mesa"])]
+                body = dump_json(tablero_adapter, filas)
+                self._json = (body, make_etag(body))
+            return self._json
+
+    # Se vuelve a leer de la BD en la próxima lectura
+    def invalidar(self):
+        self.cargado_en = None
+
+    def stats(self) -> dict:
+        return {"version": self.version, "mesas": len(self._mesas),
+                "ocupadas": sum(1 for mesa in self._mesas.values() if mesa["pedidos"])}
+
+tablero = TableroMesas()
+pubsub.al_recargar(tablero.invalidar)
+
+# Cambios de pedidos y mesas, de este worker o de otro (llegan después del commit)
+@pubsub.al_recibir(events.PEDIDO_CREADO, events.PEDIDO_DETALLES_AGREGADOS)
+def _pedido_abierto(mensaje: pubsub.Mensaje):
+    datos = mensaje.datos
+    tablero.abrir_pedido(datos["id_mesa"], datos["id_pedido"], datos["total"])
+
+@pubsub.al_recibir(events.PEDIDO_CERRADO, events.PEDIDO_CANCELADO)
+def _pedido_finalizado(mensaje: pubsub.Mensaje):
+    tablero.finalizar_pedido(mensaje.datos["id_mesa"], mensaje.datos["id_pedido"])
+
+@pubsub.al_recibir(MESA_GUARDADA)
+def _mesa_guardada(mensaje: pubsub.Mensaje):
+    tablero.guardar_mesa(mensaje.datos["id_mesa"], mensaje.datos["numero_mesa"], mensaje.datos["estado"])
+
+@pubsub.al_recibir(MESA_ELIMINADA)
+def _mesa_eliminada(mensaje: pubsub.Mensaje):
+    tablero.quitar_mesa(mensaje.datos["id_mesa"])
@@ -0,0 +1,82 @@
+"""Compara cuántas peticiones concurrentes atiende un worker con sesión síncrona vs asíncrona.
+
+Monta dos endpoints equivalentes sobre la misma tabla de productos:
+  /sync   -> patrón anterior: async def + SessionLocal (bloquea el event loop)
+  /async  -> patrón actual: async def + AsyncSession
+
+Uso (requiere PostgreSQL para simular latencia con pg_sleep):
+    python -m benchmarks.bench_async_db --requests 200 --concurrency 50 --sleep-ms 5
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import func, select
+
+from app import models
+from app.database import AsyncSessionLocal, SessionLocal, async_engine, engine
+
+def build_app(sleep_ms: int) -> FastAPI:
+    bench = FastAPI()
+
+    def query():
+        stmt = select(models.Producto.id_producto).limit(1)
+        if sleep_ms and engine.dialect.name == "postgresql":
+            stmt = stmt.add_columns(func.pg_sleep(sleep_ms / 1000))
+        return stmt
+
+    @bench.get("/sync")
+    async def sync_endpoint():
+        db = SessionLocal()
+        try:
+            return {"id": db.execute(query()).first()[0]}
+        finally:
+            db.close()
+
+    @bench.get("/async")
+    async def async_endpoint():
+        async with AsyncSessionLocal() as db:
+            return {"id": (await db.execute(query())).first()[0]}
+
+    return bench
+
+async def run(path: str, app: FastAPI, requests: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                response = await client.get(path)
+                response.raise_for_status()
+
+        await client.get(path)  # calentar el pool
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+    return {"path": path, "requests": requests, "concurrency": concurrency,
+            "seconds": round(elapsed, 4), "req_per_s": round(requests / elapsed, 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--sleep-ms", type=int, default=5, help="latencia simulada por consulta (solo PostgreSQL)")
+    args = parser.parse_args()
+
+    app = build_app(args.sleep_ms)
+
+    async def run_all():
+        try:
+            return [await run(path, app, args.requests, args.concurrency) for path in ("/sync", "/async")]
+        finally:
+            await async_engine.dispose()
+
+    results = asyncio.run(run_all())
+    results.append({"speedup": round(results[1]["req_per_s"] / results[0]["req_per_s"], 2)})
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
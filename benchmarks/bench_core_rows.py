@@ -0,0 +1,122 @@
+"""Memoria y CPU de los listados de solo lectura: entidades ORM frente a filas de Core.
+
+Para productos, usuarios y pedidos (con detalles y pagos) carga las mismas filas de las dos
+formas y las serializa con el TypeAdapter de la ruta:
+  orm   -> patrón anterior: select(Modelo) (+ selectinload) y scalars().all()
+  core  -> patrón actual: select() de las columnas de salida copiadas a namedtuples (app/filas.py)
+           y con_lineas para los pedidos
+Reporta CPU y pico de memoria por cada 1000 filas, en una sesión nueva por medición. El pico se
+mide con tracemalloc en pasadas aparte, porque el trazado encarece cada asignación.
+Apunta a la base de DATABASE_URL, con datos de scripts/seed.py:
+    python -m benchmarks.bench_core_rows --filas 1000 --repeticiones 10
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app import models, responses
+from app.database import AsyncSessionLocal, async_engine
+from app.filas import leer
+from app.routers.pedidos import COLUMNAS_RESUMEN, CabeceraFila, con_lineas
+from app.routers.productos import COLUMNAS_PRODUCTO, ProductoFila
+from app.routers.usuarios import COLUMNAS_USUARIO, UsuarioFila
+
+ORDEN_PEDIDOS = (models.Pedido.fecha_hora.desc(), models.Pedido.id_pedido.desc())
+
+async def productos_orm(db, filas: int) -> list:
+    return (await db.scalars(select(models.Producto).order_by(models.Producto.id_producto).limit(filas))).all()
+
+async def productos_core(db, filas: int) -> list:
+    return leer(ProductoFila, await db.execute(select(*COLUMNAS_PRODUCTO).order_by(models.Producto.id_producto).limit(filas)))
+
+async def usuarios_orm(db, filas: int) -> list:
+    return (await db.scalars(select(models.Usuario).order_by(models.Usuario.id_usuario).limit(filas))).all()
+
+async def usuarios_core(db, filas: int) -> list:
+    return leer(UsuarioFila, await db.execute(select(*COLUMNAS_USUARIO).order_by(models.Usuario.id_usuario).limit(filas)))
+
+async def pedidos_orm(db, filas: int) -> list:
+    query = (select(models.Pedido)
+             .options(selectinload(models.Pedido.detalles), selectinload(models.Pedido.pagos))
+             .order_by(*ORDEN_PEDIDOS).limit(filas))
+    return (await db.scalars(query)).all()
+
+async def pedidos_core(db, filas: int) -> list:
+    cabeceras = leer(CabeceraFila, await db.execute(select(*COLUMNAS_RESUMEN).order_by(*ORDEN_PEDIDOS).limit(filas)))
+    return await con_lineas(db, cabeceras)
+
+ESCENARIOS = {
+    "productos": (responses.productos_adapter, productos_orm, productos_core),
+    "usuarios": (responses.usuarios_adapter, usuarios_orm, usuarios_core),
+    "pedidos": (responses.pedidos_adapter, pedidos_orm, pedidos_core),
+}
+
+# Cargar y serializar en una sesión nueva: (filas, cuerpo, segundos de CPU, segundos reales)
+async def medir(cargar, adapter, filas: int):
+    cpu, wall = time.process_time(), time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        objetos = await cargar(db, filas)
+        body = responses.dump_json(adapter, objetos)
+    return len(objetos), body, time.process_time() - cpu, time.perf_counter() - wall
+
+# Pico de memoria (bytes) de lo mismo, con tracemalloc activo
+async def medir_memoria(cargar, adapter, filas: int) -> int:
+    tracemalloc.start()
+    try:
+        await medir(cargar, adapter, filas)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+async def comparar(nombre: str, filas: int, repeticiones: int) -> dict:
+    adapter, orm, core = ESCENARIOS[nombre]
+    resultado = {}
+    cuerpos = {}
+    for camino, cargar in (("orm", orm), ("core", core)):
+        await medir(cargar, adapter, filas)  # calentar el pool y las sentencias compiladas
+        muestras = [await medir(cargar, adapter, filas) for _ in range(repeticiones)]
+        picos = [await medir_memoria(cargar, adapter, filas) for _ in range(max(repeticiones // 3, 1))]
+        n, cuerpos[camino] = muestras[0][0], muestras[0][1]
+        por_mil = 1000 / max(n, 1)
+        resultado[camino] = {
+            "filas": n,
+            "cpu_ms_por_1000": round(statistics.median(m[2] for m in muestras) * 1e3 * por_mil, 2),
+            "wall_ms_por_1000": round(statistics.median(m[3] for m in muestras) * 1e3 * por_mil, 2),
+            "pico_kib_por_1000": round(statistics.median(picos) / 1024 * por_mil, 1),
+        }
+    # Ambos caminos deben servir exactamente el mismo documento
+    if json.loads(cuerpos["orm"]) != json.loads(cuerpos["core"]):
+        raise SystemExit(f"{nombre}: las respuestas ORM y Core no coinciden")
+    resultado["cpu_ratio"] = round(resultado["orm"]["cpu_ms_por_1000"] / max(resultado["core"]["cpu_ms_por_1000"], 1e-9), 2)
+    resultado["memoria_ratio"] = round(resultado["orm"]["pico_kib_por_1000"] / max(resultado["core"]["pico_kib_por_1000"], 1e-9), 2)
+    return resultado
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=1000)
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--escenario", choices=list(ESCENARIOS), action="append")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    async def run_all():
+        try:
+            return {nombre: await comparar(nombre, args.filas, args.repeticiones)
+                    for nombre in args.escenario or list(ESCENARIOS)}
+        finally:
+            await async_engine.dispose()
+
+    results = asyncio.run(run_all())
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+if __name__ == "__main__":
+    main()
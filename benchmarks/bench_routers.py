@@ -0,0 +1,293 @@
+"""Carga sobre los routers: latencia p50/p95/p99 y peticiones por segundo por escenario.
+
+Los resultados se guardan como JSON y sirven de línea base para comparar ejecuciones
+posteriores. Apunta a la base de DATABASE_URL (PostgreSQL local o SQLite como sustituto).
+
+    # 1. Datos (vacía las tablas; ver scripts/seed.py)
+    python -m benchmarks.bench_routers seed --reset --pedidos 1000000
+    # 2. Medir: en proceso (ASGI), con un uvicorn local o contra una URL ya levantada
+    python -m benchmarks.bench_routers run --target asgi --output base.json
+    python -m benchmarks.bench_routers run --target uvicorn --workers 4 --output base.json
+    python -m benchmarks.bench_routers run --target http://127.0.0.1:8000 --escenario menu
+    # 3. Comparar con la línea base (código 1 si algo empeora más que la tolerancia)
+    python -m benchmarks.bench_routers compare base.json actual.json --tolerancia 0.10
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import httpx
+
+from scripts.seed import ADMIN_EMAIL, SEED_PASSWORD, empleado_email
+
+class BenchError(RuntimeError):
+    pass
+
+def esperar(response: httpx.Response, *codigos: int) -> httpx.Response:
+    if response.status_code not in codigos:
+        raise BenchError(f"{response.request.method} {response.request.url.path}: HTTP {response.status_code}")
+    return response
+
+@dataclass
+class Contexto:
+    rng: random.Random
+    mesas: int
+    admin: dict = field(default_factory=dict)
+    empleados: list = field(default_factory=list)
+    emails: list = field(default_factory=list)
+    productos: list = field(default_factory=list)
+    abiertos: list = field(default_factory=list)
+
+    def empleado(self) -> dict:
+        return self.rng.choice(self.empleados)
+
+    def nuevo_pedido(self) -> dict:
+        lineas = self.rng.sample(self.productos, min(len(self.productos), self.rng.randint(5, 15)))
+        return {"id_mesa": self.rng.randint(1, self.mesas) if self.mesas else None,
+                "detalles": [{"id_producto": p, "cantidad": self.rng.randint(1, 4)} for p in lineas]}
+
+async def login(client: httpx.AsyncClient, email: str) -> dict:
+    r = esperar(await client.post("/auth/login", data={"username": email, "password": SEED_PASSWORD}), 200)
+    return {"Authorization": "Bearer " + r.json()["access_token"]}
+
+# Escenarios: (preparación fuera de la medición, paso medido)
+async def sin_preparacion(client, ctx, n):
+    pass
+
+async def menu(client, ctx):
+    esperar(await client.get("/productos/", headers=ctx.empleado()), 200)
+
+async def tablero_mesas(client, ctx):
+    esperar(await client.get("/mesas/board", headers=ctx.empleado()), 200)
+
+async def crear_pedido(client, ctx):
+    esperar(await client.post("/pedidos/", json=ctx.nuevo_pedido(), headers=ctx.empleado()), 201)
+
+async def listar_pedidos(client, ctx):
+    esperar(await client.get("/pedidos/pagina", params={"limit": 50}, headers=ctx.empleado()), 200)
+
+async def preparar_abiertos(client, ctx, n):
+    for _ in range(n):
+        headers = ctx.empleado()
+        r = esperar(await client.post("/pedidos/", json=ctx.nuevo_pedido(), headers=headers), 201)
+        ctx.abiertos.append((r.json(), headers))
+
+async def pagar_y_cerrar(client, ctx):
+    pedido, headers = ctx.abiertos.pop()
+    url = f"/pedidos/{pedido['id_pedido']}"
+    esperar(await client.post(f"{url}/pagos", headers=headers,
+                              json={"id_pedido": pedido["id_pedido"], "metodo_pago": "tarjeta", "monto": pedido["total"]}), 201)
+    esperar(await client.put(f"{url}/cerrar", headers=headers), 200)
+
+async def login_empleado(client, ctx):
+    await login(client, ctx.rng.choice(ctx.emails))
+
+ESCENARIOS = {
+    "menu": (sin_preparacion, menu),
+    "tablero_mesas": (sin_preparacion, tablero_mesas),
+    "crear_pedido": (sin_preparacion, crear_pedido),
+    "listar_pedidos": (sin_preparacion, listar_pedidos),
+    "pagar_y_cerrar": (preparar_abiertos, pagar_y_cerrar),
+    "login": (sin_preparacion, login_empleado),
+}
+
+def percentil(ordenadas: list, p: float) -> float:
+    if not ordenadas:
+        return 0.0
+    return ordenadas[min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))]
+
+async def ejecutar(nombre: str, client, ctx, requests: int, concurrency: int, warmup: int) -> dict:
+    preparar, paso = ESCENARIOS[nombre]
+    await preparar(client, ctx, requests + warmup)
+    for _ in range(warmup):
+        await paso(client, ctx)
+
+    latencias, errores = [], []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def una():
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await paso(client, ctx)
+            except (BenchError, httpx.HTTPError) as exc:
+                errores.append(str(exc))
+                return
+            latencias.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(una() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    latencias.sort()
+    ms = lambda s: round(s * 1000, 2)
+    return {
+        "requests": requests, "concurrency": concurrency, "errors": len(errores),
+        "first_error": errores[0] if errores else None,
+        "seconds": round(elapsed, 3), "req_per_s": round(len(latencias) / elapsed, 1),
+        "p50_ms": ms(percentil(latencias, 50)), "p95_ms": ms(percentil(latencias, 95)),
+        "p99_ms": ms(percentil(latencias, 99)), "mean_ms": ms(statistics.fmean(latencias)) if latencias else 0.0,
+        "max_ms": ms(latencias[-1]) if latencias else 0.0,
+    }
+
+@asynccontextmanager
+async def cliente_asgi(concurrency: int):
+    # En proceso: mismo event loop que el cliente, sin red; se ejecuta el lifespan de la app
+    from app.main import app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            yield client
+
+@asynccontextmanager
+async def cliente_http(base_url: str, concurrency: int):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        yield client
+
+@asynccontextmanager
+async def cliente_uvicorn(concurrency: int, port: int, workers: int):
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+                             "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+                            env=os.environ.copy())
+    try:
+        async with cliente_http(f"http://127.0.0.1:{port}", concurrency) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    esperar(await client.get("/"), 200)
+                    break
+                except (httpx.HTTPError, BenchError):
+                    if proc.poll() is not None or time.monotonic() > deadline:
+                        raise BenchError("uvicorn no arrancó")
+                    await asyncio.sleep(0.2)
+            yield client
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+def abrir_cliente(args):
+    if args.target == "asgi":
+        return cliente_asgi(args.concurrency)
+    if args.target == "uvicorn":
+        return cliente_uvicorn(args.concurrency, args.port, args.workers)
+    return cliente_http(args.target, args.concurrency)
+
+async def correr(args) -> dict:
+    ctx = Contexto(rng=random.Random(args.semilla), mesas=args.mesas,
+                   emails=[empleado_email(n) for n in range(args.empleados)])
+    resultados = {}
+    async with abrir_cliente(args) as client:
+        ctx.admin = await login(client, ADMIN_EMAIL)
+        ctx.empleados = [await login(client, email) for email in ctx.emails]
+        r = esperar(await client.get("/productos/", params={"limit": 1000}, headers=ctx.admin), 200)
+        ctx.productos = [p["id_producto"] for p in r.json()]
+        for nombre in args.escenario or list(ESCENARIOS):
+            resultados[nombre] = await ejecutar(nombre, client, ctx, args.requests, args.concurrency, args.warmup)
+            print(f"{nombre}: {resultados[nombre]['req_per_s']} req/s, p95 {resultados[nombre]['p95_ms']} ms",
+                  file=sys.stderr)
+    if args.target == "asgi":
+        from app.database import async_engine
+        await async_engine.dispose()
+    return resultados
+
+def revision_git() -> str:
+    proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+    return proc.stdout.strip() or None
+
+def cmd_seed(args):
+    from scripts.seed import seed
+    if not args.reset:
+        sys.exit("seed vacía las tablas de DATABASE_URL: confirma con --reset")
+    conteos = seed(productos=args.productos, mesas=args.mesas, empleados=args.empleados,
+                   pedidos=args.pedidos, bloque=args.bloque, semilla=args.semilla, reset=True,
+                   log=lambda msg: print(msg, file=sys.stderr))
+    print(json.dumps(conteos, indent=2))
+
+def cmd_run(args):
+    resultados = asyncio.run(correr(args))
+    informe = {
+        "meta": {"fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"), "git": revision_git(),
+                 "target": args.target, "workers": args.workers if args.target == "uvicorn" else None,
+                 "database": os.getenv("DATABASE_URL", "").split("://")[0] or None,
+                 "python": platform.python_version(), "requests": args.requests, "concurrency": args.concurrency},
+        "escenarios": resultados,
+    }
+    salida = json.dumps(informe, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(salida + "\n")
+    print(salida)
+
+# Empeora si bajan las req/s o suben p95/p99 más que la tolerancia relativa
+def comparar(base: dict, actual: dict, tolerancia: float) -> list:
+    filas = []
+    for nombre, b in base["escenarios"].items():
+        a = actual["escenarios"].get(nombre)
+        if a is None:
+            continue
+        for metrica, mayor_es_mejor in (("req_per_s", True), ("p50_ms", False), ("p95_ms", False), ("p99_ms", False)):
+            if not b[metrica]:
+                continue
+            cambio = (a[metrica] - b[metrica]) / b[metrica]
+            regresion = -cambio > tolerancia if mayor_es_mejor else cambio > tolerancia
+            filas.append((nombre, metrica, b[metrica], a[metrica], cambio, regresion))
+    return filas
+
+def cmd_compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.actual) as f:
+        actual = json.load(f)
+    filas = comparar(base, actual, args.tolerancia)
+    for nombre, metrica, b, a, cambio, regresion in filas:
+        print(f"{'REGRESIÓN' if regresion else 'ok':>9}  {nombre:<15} {metrica:<9} {b:>10} -> {a:<10} ({cambio:+.1%})")
+    sys.exit(1 if any(fila[-1] for fila in filas) else 0)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    seed = sub.add_parser("seed", help="vaciar y llenar las tablas (ver scripts/seed.py)")
+    seed.add_argument("--reset", action="store_true", help="confirmar que se borran las tablas existentes")
+    seed.add_argument("--productos", type=int, default=500)
+    seed.add_argument("--pedidos", type=int, default=1_000_000)
+    seed.add_argument("--bloque", type=int, default=20_000)
+    seed.set_defaults(func=cmd_seed)
+
+    run = sub.add_parser("run", help="ejecutar los escenarios y escribir el informe JSON")
+    run.add_argument("--target", default="asgi", help="asgi, uvicorn o una URL base (http://host:puerto)")
+    run.add_argument("--escenario", choices=list(ESCENARIOS), action="append")
+    run.add_argument("--requests", type=int, default=500)
+    run.add_argument("--concurrency", type=int, default=20)
+    run.add_argument("--warmup", type=int, default=20)
+    run.add_argument("--port", type=int, default=8765, help="solo --target uvicorn")
+    run.add_argument("--workers", type=int, default=1, help="solo --target uvicorn")
+    run.add_argument("--output", help="fichero JSON para usar como línea base")
+    run.set_defaults(func=cmd_run)
+
+    for p in (seed, run):
+        p.add_argument("--mesas", type=int, default=50)
+        p.add_argument("--empleados", type=int, default=20)
+        p.add_argument("--semilla", type=int, default=42)
+
+    compare = sub.add_parser("compare", help="comparar dos informes JSON")
+    compare.add_argument("base")
+    compare.add_argument("actual")
+    compare.add_argument("--tolerancia", type=float, default=0.10)
+    compare.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Coste de serializar las respuestas de los listados, sin BD ni HTTP de por medio.
+
+Compara, por petición, el camino de FastAPI con response_model (validar, volcar a dicts y
+codificar con json) con el TypeAdapter precompilado de app/responses.py, que produce los bytes
+en una sola pasada. Los objetos son instancias ORM en memoria, como las que devuelve la sesión:
+    python -m benchmarks.bench_serialization --filas 100 --repeticiones 200
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app import models, responses, schemas
+
+def pedidos(n: int, rng: random.Random) -> list:
+    inicio = datetime(2026, 1, 1, 12, 0)
+    filas = []
+    for i in range(1, n + 1):
+        fecha = inicio + timedelta(minutes=i)
+        detalles = [models.DetallePedido(id_detalle=i * 100 + j, id_pedido=i, id_producto=rng.randint(1, 60),
+                                         cantidad=rng.randint(1, 4), precio_unitario=round(rng.uniform(2, 30), 2))
+                    for j in range(rng.randint(5, 15))]
+        for d in detalles:
+            d.subtotal = d.cantidad * d.precio_unitario
+        total = sum(d.subtotal for d in detalles)
+        pedido = models.Pedido(id_pedido=i, id_usuario=rng.randint(1, 20), id_mesa=rng.randint(1, 30),
+                               fecha_hora=fecha, total=total, estado=models.EstadoPedidoEnum.cerrado)
+        pedido.detalles = detalles
+        pedido.pagos = [models.Pago(id_pago=i, id_pedido=i, metodo_pago=models.MetodoPagoEnum.tarjeta,
+                                    monto=total, fecha_hora=fecha)]
+        filas.append(pedido)
+    return filas
+
+def productos(n: int, rng: random.Random) -> list:
+    return [models.Producto(id_producto=i, nombre=f"Producto {i}", descripcion="Descripción del plato " * 3,
+                            precio=round(rng.uniform(2, 30), 2), categoria=rng.choice(["entradas", "platos", "postres"]),
+                            activo=True, fecha_creacion=datetime(2026, 1, 1))
+            for i in range(1, n + 1)]
+
+def usuarios(n: int, rng: random.Random) -> list:
+    return [models.Usuario(id_usuario=i, nombre_completo=f"Empleado {i}", email=f"empleado{i}@bench.example.com",
+                           contrasena_hash="x", rol=models.RolEnum.empleado, activo=True,
+                           fecha_creacion=datetime(2026, 1, 1))
+            for i in range(1, n + 1)]
+
+# (schema de la ruta, TypeAdapter de app/responses.py, generador de filas)
+ESCENARIOS = {
+    "pedidos": (List[schemas.PedidoOut], responses.pedidos_adapter, pedidos),
+    "productos": (List[schemas.ProductoOut], responses.productos_adapter, productos),
+    "usuarios": (List[schemas.UsuarioOut], responses.usuarios_adapter, usuarios),
+}
+
+def medir(fn, repeticiones: int) -> float:
+    muestras = []
+    for _ in range(repeticiones):
+        started = time.perf_counter()
+        fn()
+        muestras.append(time.perf_counter() - started)
+    return statistics.median(muestras)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=100)
+    parser.add_argument("--repeticiones", type=int, default=200)
+    parser.add_argument("--escenario", choices=list(ESCENARIOS), action="append")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    results = {"orjson": responses.orjson is not None, "filas": args.filas}
+    for nombre in args.escenario or list(ESCENARIOS):
+        tipo, adapter, generar = ESCENARIOS[nombre]
+        filas = generar(args.filas, random.Random(1))
+        field = create_model_field(name=f"Response_{nombre}", type_=tipo, mode="serialization")
+
+        # Lo que hace FastAPI con response_model y la clase de respuesta indicada. Las variables
+        # del bucle se enlazan como valores por defecto: las closures no deben ver las del escenario siguiente.
+        def fastapi(response_class=JSONResponse, field=field, filas=filas):
+            contenido = loop.run_until_complete(serialize_response(field=field, response_content=filas))
+            return response_class(contenido).body
+
+        caminos = {
+            "response_model": fastapi,
+            "response_model+FastJSONResponse": lambda fastapi=fastapi: fastapi(responses.FastJSONResponse),
+            "type_adapter": lambda adapter=adapter, filas=filas: responses.json_response(adapter, filas).body,
+        }
+        # Los tres caminos deben producir el mismo documento
+        documentos = {camino: json.loads(fn()) for camino, fn in caminos.items()}
+        if any(doc != documentos["response_model"] for doc in documentos.values()):
+            raise SystemExit(f"{nombre}: las respuestas no coinciden entre caminos")
+
+        tiempos = {camino: medir(fn, args.repeticiones) for camino, fn in caminos.items()}
+        base = tiempos["response_model"]
+        results[nombre] = {
+            camino: {"ms_por_peticion": round(t * 1e3, 3), "aceleracion": round(base / t, 2)}
+            for camino, t in tiempos.items()
+        }
+        results[nombre]["bytes"] = len(caminos["type_adapter"]())
+    loop.close()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+if __name__ == "__main__":
+    main()
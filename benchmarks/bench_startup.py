@@ -0,0 +1,64 @@
+"""Mide el arranque en frío de un worker: importar app.main y ejecutar el lifespan.
+
+Compara el arranque actual con el comportamiento anterior (create_all al importar),
+cada medición en un proceso nuevo:
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ESCENARIOS = {
+    # Solo importar: lo que hace uvicorn antes de aceptar conexiones
+    "import": "import app.main",
+    # Comportamiento anterior: create_all contra la BD durante la importación
+    "import+create_all": "import app.main\nfrom app.database import Base, engine\nBase.metadata.create_all(bind=engine)",
+    # Arranque completo actual: importar + lifespan (warm-up y verificación de esquema)
+    "import+lifespan": (
+        "import asyncio, app.main\n"
+        "from app import startup\n"
+        "async def run():\n"
+        "    await startup.on_startup()\n"
+        "    await startup.on_shutdown()\n"
+        "asyncio.run(run())"
+    ),
+}
+
+IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|\s+app\.main$")
+
+def medir(codigo: str) -> dict:
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo],
+                          capture_output=True, text=True, env=os.environ.copy())
+    elapsed = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    cumulative_us = None
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME.search(line.strip())
+        if match:
+            cumulative_us = int(match.group(2))
+    return {"wall_s": elapsed, "import_app_main_s": cumulative_us / 1e6 if cumulative_us else None}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--escenario", choices=list(ESCENARIOS), action="append")
+    args = parser.parse_args()
+
+    results = {}
+    for nombre in args.escenario or list(ESCENARIOS):
+        muestras = [medir(ESCENARIOS[nombre]) for _ in range(args.runs)]
+        results[nombre] = {
+            "wall_s_median": round(statistics.median(m["wall_s"] for m in muestras), 4),
+            "import_app_main_s_median": round(statistics.median(m["import_app_main_s"] or 0 for m in muestras), 4),
+        }
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Comprueba el reparto de eventos de /eventos a los suscriptores según sus filtros.
+
+No necesita BD ni servidor: publica en un Broadcaster propio y mira qué llega a cada cola.
+    python -m scripts.check_events
+
+El caso importante es "reset": tras perder mensajes todos los clientes deben recargar, también
+los que filtran por tipo, categoría o empleado. Termina con código 1 si algún caso falla.
+"""
+import sys
+
+from app import events, models
+
+ADMIN, EMPLEADO = models.RolEnum.admin, models.RolEnum.empleado
+
+# (descripción, suscriptor, tipo publicado, id_usuario del evento, categorías, ¿debe recibirlo?)
+CASOS = [
+    ("reset a un suscriptor filtrado por tipos de pedido",
+     dict(rol=ADMIN, id_usuario=1, tipos=frozenset({events.PEDIDO_CREADO, events.PEDIDO_CERRADO})),
+     events.RESET, None, (), True),
+    ("reset a un suscriptor filtrado por categoría",
+     dict(rol=ADMIN, id_usuario=1, categorias=frozenset({"bebidas"})),
+     events.RESET, None, (), True),
+    ("reset a un empleado que solo ve sus pedidos",
+     dict(rol=EMPLEADO, id_usuario=2, tipos=frozenset({events.PEDIDO_CREADO}), solo_usuario=2),
+     events.RESET, None, (), True),
+    ("mesa.actualizada a un suscriptor filtrado por tipos de pedido",
+     dict(rol=ADMIN, id_usuario=1, tipos=frozenset({events.PEDIDO_CREADO})),
+     events.MESA_ACTUALIZADA, None, (), False),
+    ("pedido de otro empleado",
+     dict(rol=EMPLEADO, id_usuario=2),
+     events.PEDIDO_CREADO, 3, ("platos",), False),
+    ("pedido de otra categoría",
+     dict(rol=ADMIN, id_usuario=1, categorias=frozenset({"bebidas"})),
+     events.PEDIDO_CREADO, 3, ("platos",), False),
+]
+
+def main() -> int:
+    fallos = 0
+    for descripcion, filtros, tipo, id_usuario, categorias, esperado in CASOS:
+        broadcaster = events.Broadcaster()
+        suscriptor = events.Suscriptor(**filtros)
+        broadcaster.suscribir(suscriptor)
+        broadcaster.publicar(tipo, {}, id_usuario, categorias)
+        recibido = not suscriptor.cola.empty()
+        ok = recibido == esperado
+        fallos += not ok
+        print(f"[{'OK' if ok else 'FALLO'}] {descripcion}: {'recibido' if recibido else 'no recibido'}")
+
+    # Last-Event-ID de otro arranque: el replay es un único reset, con filtros o sin ellos
+    broadcaster = events.Broadcaster()
+    replay = broadcaster.suscribir(events.Suscriptor(rol=ADMIN, id_usuario=1, tipos=frozenset({events.PEDIDO_CREADO})),
+                                   "otroarranque-5")
+    ok = len(replay) == 1 and f"event: {events.RESET}\n" in replay[0]
+    fallos += not ok
+    print(f"[{'OK' if ok else 'FALLO'}] replay desde otro arranque: {len(replay)} mensaje(s)")
+    return 1 if fallos else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""Verifica con EXPLAIN que las consultas de los routers usan los índices esperados.
+
+Se ejecuta contra una base PostgreSQL migrada (alembic upgrade head):
+    python -m scripts.check_indices
+
+Con enable_seqscan desactivado el planificador elige un índice siempre que
+pueda usarlo, así que la comprobación no depende del volumen de datos.
+Termina con código 1 si alguna consulta no usa su índice.
+"""
+import json
+import sys
+from datetime import datetime, timezone
+
+from sqlalchemy import select, text, tuple_
+
+from app import models
+from app.database import engine
+
+AHORA = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+# (descripción, consulta, índice esperado)
+CONSULTAS = [
+    ("pedidos de un empleado, más recientes primero",
+     select(models.Pedido).where(models.Pedido.id_usuario == 1)
+     .order_by(models.Pedido.fecha_hora.desc(), models.Pedido.id_pedido.desc()).limit(50),
+     "ix_pedidos_usuario_fecha_hora_id_pedido"),
+    ("página por cursor (admin)",
+     select(models.Pedido).where(tuple_(models.Pedido.fecha_hora, models.Pedido.id_pedido) < tuple_(AHORA, 1000))
+     .order_by(models.Pedido.fecha_hora.desc(), models.Pedido.id_pedido.desc()).limit(50),
+     "ix_pedidos_fecha_hora_id_pedido"),
+    ("pedidos abiertos de una mesa",
+     select(models.Pedido.id_pedido).where(models.Pedido.id_mesa == 1, models.Pedido.estado == "abierto"),
+     "ix_pedidos_abiertos_mesa"),
+    ("detalles de una página de pedidos (selectinload)",
+     select(models.DetallePedido).where(models.DetallePedido.id_pedido.in_([1, 2, 3])),
+     "ix_detalle_pedido_id_pedido"),
+    ("ventas de un producto",
+     select(models.DetallePedido).where(models.DetallePedido.id_producto == 1),
+     "ix_detalle_pedido_id_producto"),
+    ("pagos de una página de pedidos (selectinload)",
+     select(models.Pago).where(models.Pago.id_pedido.in_([1, 2, 3])),
+     "ix_pagos_id_pedido"),
+    ("menú de productos activos",
+     select(models.Producto).where(models.Producto.activo == True)
+     .order_by(models.Producto.id_producto).limit(100),
+     "ix_productos_activos"),
+]
+
+def indices_del_plan(nodo: dict) -> set:
+    encontrados = {nodo["Index Name"]} if "Index Name" in nodo else set()
+    for hijo in nodo.get("Plans", []):
+        encontrados |= indices_del_plan(hijo)
+    return encontrados
+
+def main() -> int:
+    if engine.dialect.name != "postgresql":
+        print("check_indices requiere PostgreSQL", file=sys.stderr)
+        return 2
+    fallos = 0
+    with engine.connect() as conn:
+        conn.execute(text("SET enable_seqscan = off"))
+        for descripcion, consulta, esperado in CONSULTAS:
+            sql = str(consulta.compile(engine, compile_kwargs={"literal_binds": True}))
+            plan = conn.execute(text("EXPLAIN (FORMAT JSON) " + sql)).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            usados = indices_del_plan(plan[0]["Plan"])
+            ok = esperado in usados
+            fallos += not ok
+            print(f"[{'OK' if ok else 'FALLO'}] {descripcion}: esperado {esperado}, usados {sorted(usados) or '-'}")
+    return 1 if fallos else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
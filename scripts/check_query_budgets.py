@@ -0,0 +1,131 @@
+"""Ejecuta los endpoints de pedidos, productos y mesas y falla si alguno excede su @query_budget.
+
+Pensado para CI: detecta regresiones N+1 (una consulta por línea de pedido,
+por pedido listado, etc.) antes de que aparezcan bajo carga.
+    python -m scripts.check_query_budgets
+
+Usa una base SQLite temporal (requiere aiosqlite y httpx, ver benchmarks/requirements.txt);
+QUERY_BUDGET_DATABASE_URL permite apuntar a una base PostgreSQL desechable: se borran y
+recrean las tablas. Las cachés se vacían antes de cada petición para medir el peor caso.
+Termina con código 1 si alguna ruta excede su presupuesto o si la paginación por cursor
+repite o salta pedidos (los de la prueba se crean en el mismo segundo: caso frontera).
+"""
+import os
+import sys
+import tempfile
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = os.getenv("QUERY_BUDGET_DATABASE_URL", f"sqlite:///{_tmp.name}/budgets.db")
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.setdefault("SECRET_KEY", "check-query-budgets")
+os.environ["SCHEMA_CHECK"] = "off"
+
+from fastapi.testclient import TestClient
+
+from app import dependencies, models
+from app.auth import get_password_hash
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.querybudget import capture_queries
+from app.routers import pedidos, productos
+from app.tablero import tablero
+
+# Suficientes filas para que un N+1 supere cualquier presupuesto razonable
+N_PRODUCTOS = 12
+N_PEDIDOS = 6
+
+def preparar_base():
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        for email, rol in (("admin@budget.local", "admin"), ("empleado@budget.local", "empleado")):
+            db.add(models.Usuario(nombre_completo=rol, email=email, rol=rol,
+                                  contrasena_hash=get_password_hash("budget")))
+        db.add_all(models.Mesa(numero_mesa=n) for n in (1, 2))
+        db.add_all(models.Producto(nombre=f"Producto {n}", precio=10 + n, categoria="cocina")
+                   for n in range(N_PRODUCTOS))
+        db.commit()
+
+# Peor caso: sin principal cacheado, sin menú cacheado y sin pedidos finalizados en caché
+def vaciar_caches():
+    dependencies.principal_cache.clear()
+    productos.menu_cache.bump()
+    pedidos.pedidos_finalizados.clear()
+    tablero.cargado_en = None
+
+# Recorrer /pedidos/pagina de a dos hacia delante y volver hacia atrás: cada pedido una sola vez
+def comprobar_paginacion(client, headers, ids) -> list:
+    esperados = sorted(ids, reverse=True)
+    adelante, paginas, cursor = [], [], None
+    while len(paginas) <= len(ids):
+        params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+        pagina = client.get("/pedidos/pagina", headers=headers, params=params).json()
+        paginas.append(pagina)
+        adelante += [p["id_pedido"] for p in pagina["items"]]
+        cursor = pagina["next_cursor"]
+        if cursor is None:
+            break
+    atras, cursor = [], paginas[-1]["prev_cursor"]
+    while cursor is not None and len(atras) <= len(ids):
+        pagina = client.get("/pedidos/pagina", headers=headers, params={"limit": 2, "cursor": cursor}).json()
+        atras = [p["id_pedido"] for p in pagina["items"]] + atras
+        cursor = pagina["prev_cursor"]
+    fallos = []
+    if adelante != esperados:
+        fallos.append(f"GET /pedidos/pagina hacia delante: {adelante}, se esperaba {esperados}")
+    if atras + [p["id_pedido"] for p in paginas[-1]["items"]] != esperados:
+        fallos.append(f"GET /pedidos/pagina hacia atrás: {atras}, se esperaba {esperados[:len(atras)]}")
+    return fallos
+
+def main() -> int:
+    preparar_base()
+    fallos = []
+    with TestClient(app, raise_server_exceptions=False) as client:
+        def token(email):
+            r = client.post("/auth/login", data={"username": email, "password": "budget"})
+            return {"Authorization": "Bearer " + r.json()["access_token"]}
+        admin, empleado = token("admin@budget.local"), token("empleado@budget.local")
+
+        def pedir(method, url, headers, **kwargs):
+            vaciar_caches()
+            r = client.request(method, url, headers=headers, **kwargs)
+            if r.status_code >= 500:
+                fallos.append(f"{method} {url}: HTTP {r.status_code}")
+            return r.json() if r.is_success and r.content else {}
+
+        with capture_queries() as capture:
+            lineas = [{"id_producto": n + 1, "cantidad": 1} for n in range(N_PRODUCTOS)]
+            ids = [pedir("POST", "/pedidos/", empleado, json={"id_mesa": 1, "detalles": lineas}).get("id_pedido")
+                   for _ in range(N_PEDIDOS)]
+            pedir("GET", "/pedidos/", empleado)
+            pedir("GET", "/pedidos/", admin, params={"view": "summary"})
+            pedir("GET", "/pedidos/pagina", admin, params={"limit": N_PEDIDOS})
+            pedir("GET", f"/pedidos/{ids[0]}", empleado)
+            pedir("GET", f"/pedidos/{ids[0]}", {**empleado, "If-None-Match": '"otra"'})  # revalidación fallida
+            pedir("POST", f"/pedidos/{ids[2]}/detalles", empleado, json=lineas)
+            pedir("POST", f"/pedidos/{ids[0]}/pagos", empleado,
+                  json={"id_pedido": ids[0], "metodo_pago": "efectivo", "monto": 5})
+            pedir("PUT", f"/pedidos/{ids[0]}/cerrar", empleado)
+            pedir("PUT", f"/pedidos/{ids[1]}/cancelar", admin)
+            pedir("PUT", f"/pedidos/{ids[0]}/cerrar", empleado)  # camino de error (400)
+            pedir("GET", f"/pedidos/{ids[0]}", admin)
+            pedir("GET", "/mesas/board", empleado)
+            pedir("GET", "/productos/", empleado)
+            pedir("GET", "/productos/1", empleado)
+            nuevo = pedir("POST", "/productos/", admin, json={"nombre": "Nuevo", "precio": 1, "categoria": "bebida"})
+            pedir("PUT", f"/productos/{nuevo.get('id_producto')}", admin, json={"precio": 2})
+            pedir("DELETE", f"/productos/{nuevo.get('id_producto')}", admin)
+
+        fallos += comprobar_paginacion(client, admin, ids)
+
+    for log in capture.requests:
+        estado = "FALLO" if log.exceeded else "OK"
+        print(f"[{estado}] {log.route}: {log.count}/{log.budget or '-'} sentencias")
+        if log.exceeded:
+            fallos.append(log.report())
+    for fallo in fallos:
+        print(fallo, file=sys.stderr)
+    return 1 if fallos else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Recalcula ventas_rollup a partir de pedidos, detalles y pagos (backfill o reparación).
+
+    python -m scripts.rebuild_rollup                      # todo el historial
+    python -m scripts.rebuild_rollup --desde 2026-01-01 --hasta 2026-02-01 --paralelo 4
+
+El rango se parte en bloques de días locales (REPORTES_ZONA_HORARIA) que se reconstruyen
+en paralelo, cada uno en su propia transacción: DELETE de sus periodos + INSERT ... SELECT
+agrupado. Los bloques no comparten filas del rollup, así que no se bloquean entre sí.
+Los días con tráfico en curso conviene reconstruirlos fuera de hora: un cierre que confirma
+mientras su bloque se recalcula puede contarse dos veces o ninguna.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app import models, rollup
+from app.database import async_engine
+
+async def rango_historial() -> tuple:
+    dialect = async_engine.dialect.name
+    async with async_engine.connect() as conn:
+        primero, ultimo = (await conn.execute(
+            select(func.min(models.Pedido.fecha_hora), func.max(models.Pedido.fecha_hora))
+        )).one()
+    if primero is None:
+        return None, None
+    if isinstance(primero, str):  # SQLite devuelve texto en MIN/MAX
+        primero, ultimo = datetime.fromisoformat(primero), datetime.fromisoformat(ultimo)
+    return rollup.a_local(primero, dialect).date(), rollup.a_local(ultimo, dialect).date() + timedelta(days=1)
+
+def bloques(desde: date, hasta: date, dias: int):
+    while desde < hasta:
+        fin = min(desde + timedelta(days=dias), hasta)
+        yield desde, fin
+        desde = fin
+
+async def reconstruir_bloque(desde: date, hasta: date, semaforo: asyncio.Semaphore) -> float:
+    async with semaforo:
+        started = time.perf_counter()
+        async with async_engine.begin() as conn:
+            for sentencia in rollup.sentencias_reconstruccion(async_engine.dialect.name, desde, hasta):
+                await conn.execute(sentencia)
+        elapsed = time.perf_counter() - started
+        print(f"{desde} - {hasta}: {elapsed:.2f}s", file=sys.stderr)
+        return elapsed
+
+async def reconstruir(desde: date = None, hasta: date = None, dias_por_bloque: int = 7, paralelo: int = 4) -> dict:
+    try:
+        if desde is None or hasta is None:
+            primero, ultimo = await rango_historial()
+            desde, hasta = desde or primero, hasta or ultimo
+        if desde is None:
+            return {"bloques": 0}
+        semaforo = asyncio.Semaphore(paralelo)
+        started = time.perf_counter()
+        tiempos = await asyncio.gather(*(reconstruir_bloque(d, h, semaforo)
+                                         for d, h in bloques(desde, hasta, dias_por_bloque)))
+        return {"desde": desde.isoformat(), "hasta": hasta.isoformat(), "bloques": len(tiempos),
+                "seconds": round(time.perf_counter() - started, 2)}
+    finally:
+        await async_engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--desde", type=date.fromisoformat, help="primer día local (incluido)")
+    parser.add_argument("--hasta", type=date.fromisoformat, help="último día local (excluido)")
+    parser.add_argument("--dias-por-bloque", type=int, default=7)
+    parser.add_argument("--paralelo", type=int, default=4, help="bloques a la vez (no más que el pool de conexiones)")
+    args = parser.parse_args()
+    resultado = asyncio.run(reconstruir(args.desde, args.hasta, args.dias_por_bloque, args.paralelo))
+    print(json.dumps(resultado, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""Genera un historial de pedidos sintético y realista para benchmarks y staging.
+
+    python -m scripts.seed --pedidos 1000000 --reset
+
+- Popularidad de productos sesgada (Zipf): unos pocos productos concentran las ventas.
+- Horas punta: almuerzo y cena, con más pedidos en fin de semana.
+- Pagos divididos: parte de las cuentas se pagan en 2-4 pagos con métodos distintos.
+
+Los pedidos se generan día a día de forma perezosa y se vuelcan por bloques: en
+PostgreSQL (psycopg2) con COPY FROM STDIN, en otros motores con INSERT multi-fila.
+Con --reset se vacían las tablas (TRUNCATE en PostgreSQL) conservando el esquema y
+la revisión de Alembic; sin él, las tablas deben estar vacías.
+Todos los usuarios generados tienen la contraseña SEED_PASSWORD.
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate, islice
+
+from sqlalchemy import func, insert, select, text, update
+
+from app import models, rollup
+from app.auth import get_password_hash
+from app.database import Base, engine as default_engine
+
+SEED_PASSWORD = "bench"
+ADMIN_EMAIL = "admin@bench.example.com"
+CATEGORIAS = ("entradas", "platos", "postres", "bebidas", "cafes")
+METODOS = ("tarjeta", "efectivo", "transferencia")
+PESOS_METODOS = (55, 35, 10)
+
+# Pedidos por hora del día (0-23): desayuno, almuerzo 13-15 y cena 20-22
+PESOS_HORA = (0, 0, 0, 0, 0, 0, 0, 1, 3, 4, 3, 3, 6, 12, 14, 8, 3, 3, 4, 7, 12, 13, 8, 2)
+# Lunes a domingo
+PESOS_DIA = (0.8, 0.85, 0.9, 1.0, 1.3, 1.45, 1.2)
+# Unidades por línea
+PESOS_CANTIDAD = (60, 25, 10, 5)
+PROPORCION_CANCELADOS = 0.03
+PROPORCION_PAGO_DIVIDIDO = 0.3
+
+COLUMNAS = {
+    "pedidos": ("id_pedido", "id_usuario", "id_mesa", "fecha_hora", "total", "estado"),
+    "detalle_pedido": ("id_detalle", "id_pedido", "id_producto", "cantidad", "precio_unitario"),
+    "pagos": ("id_pago", "id_pedido", "metodo_pago", "monto", "fecha_hora"),
+}
+
+def empleado_email(n: int) -> str:
+    return f"empleado{n}@bench.example.com"
+
+# Zipf sobre un orden aleatorio: los más vendidos no son siempre los primeros ids
+def popularidad(ids_productos: list, rng: random.Random, s: float = 0.8) -> list:
+    orden = ids_productos[:]
+    rng.shuffle(orden)
+    pesos = {id_producto: 1 / (rango + 1) ** s for rango, id_producto in enumerate(orden)}
+    return list(accumulate(pesos[i] for i in ids_productos))
+
+def marcas_de_tiempo(n_pedidos: int, dias: int, rng: random.Random, fin: datetime):
+    """Fechas en orden cronológico, repartidas por día de la semana y hora punta; un día a la vez en memoria."""
+    inicio = (fin - timedelta(days=dias)).replace(hour=0, minute=0, second=0, microsecond=0)
+    pesos = [PESOS_DIA[(inicio + timedelta(days=d)).weekday()] for d in range(dias)]
+    total_pesos = sum(pesos)
+    horas = range(24)
+    acumulado = generados = 0
+    for d, peso in enumerate(pesos):
+        acumulado += peso
+        hasta = round(n_pedidos * acumulado / total_pesos)
+        dia = inicio + timedelta(days=d)
+        segundos = sorted(h * 3600 + rng.randrange(3600) for h in rng.choices(horas, PESOS_HORA, k=hasta - generados))
+        generados = hasta
+        for s in segundos:
+            yield dia + timedelta(seconds=s)
+
+def generar_pedidos(n_pedidos: int, precios: dict, n_mesas: int, ids_empleados: list,
+                    rng: random.Random, dias: int = 365, abiertos: int = 0):
+    """(pedido, detalles, pagos) como tuplas en el orden de COLUMNAS; los ids se asignan aquí."""
+    ids_productos = list(precios)
+    cum_pesos = popularidad(ids_productos, rng)
+    fin = datetime.now(timezone.utc)
+    mesas_libres = list(range(1, n_mesas + 1))
+    rng.shuffle(mesas_libres)
+    id_detalle = id_pago = 0
+    for id_pedido, fecha in enumerate(marcas_de_tiempo(n_pedidos, dias, rng, fin), start=1):
+        # Los últimos pedidos siguen abiertos, cada uno en una mesa distinta
+        if id_pedido > n_pedidos - abiertos and mesas_libres:
+            estado, id_mesa = "abierto", mesas_libres.pop()
+        else:
+            estado = "cancelado" if rng.random() < PROPORCION_CANCELADOS else "cerrado"
+            id_mesa = rng.randint(1, n_mesas) if n_mesas else None
+
+        # Sin repetir producto en el pedido: se sortea de más y se descartan los duplicados
+        lineas = rng.randint(5, 15)
+        elegidos = dict.fromkeys(rng.choices(ids_productos, cum_weights=cum_pesos, k=lineas * 2))
+        detalles, total = [], 0.0
+        for id_producto in islice(elegidos, lineas):
+            id_detalle += 1
+            cantidad = rng.choices((1, 2, 3, 4), PESOS_CANTIDAD)[0]
+            detalles.append((id_detalle, id_pedido, id_producto, cantidad, precios[id_producto]))
+            total += cantidad * precios[id_producto]
+        total = round(total, 2)
+
+        pagos = []
+        if estado == "cerrado":
+            partes = rng.randint(2, 4) if rng.random() < PROPORCION_PAGO_DIVIDIDO else 1
+            cuota = round(total / partes, 2)
+            hora_pago = fecha + timedelta(minutes=rng.randint(20, 120))
+            for parte in range(partes):
+                id_pago += 1
+                monto = cuota if parte < partes - 1 else round(total - cuota * (partes - 1), 2)
+                pagos.append((id_pago, id_pedido, rng.choices(METODOS, PESOS_METODOS)[0], monto,
+                              hora_pago + timedelta(seconds=parte * 30)))
+        yield (id_pedido, rng.choice(ids_empleados), id_mesa, fecha, total, estado), detalles, pagos
+
+class CopyWriter:
+    """COPY ... FROM STDIN (formato CSV) sobre la conexión psycopg2 de la transacción."""
+
+    def __init__(self, conn):
+        self.cursor = conn.connection.dbapi_connection.cursor()
+
+    def write(self, tabla: str, filas: list):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(filas)  # None -> campo vacío = NULL en COPY CSV
+        buffer.seek(0)
+        self.cursor.copy_expert(f"COPY {tabla} ({', '.join(COLUMNAS[tabla])}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+class InsertWriter:
+    """INSERT multi-fila (insertmanyvalues) para SQLite y drivers sin COPY."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def write(self, tabla: str, filas: list):
+        columnas = COLUMNAS[tabla]
+        self.conn.execute(insert(Base.metadata.tables[tabla]), [dict(zip(columnas, fila)) for fila in filas])
+
+def usa_copy(engine) -> bool:
+    return engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2"
+
+def preparar_tablas(engine, reset: bool):
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        if reset:
+            tablas = [t.name for t in reversed(Base.metadata.sorted_tables)]
+            if engine.dialect.name == "postgresql":
+                conn.execute(text(f"TRUNCATE {', '.join(tablas)} RESTART IDENTITY CASCADE"))
+            else:
+                for tabla in tablas:
+                    conn.execute(text(f"DELETE FROM {tabla}"))
+        elif any(conn.scalar(select(func.count()).select_from(tabla)) for tabla in Base.metadata.sorted_tables):
+            raise SystemExit("La base ya tiene datos: usa --reset para vaciarla")
+
+# Con ids explícitos las secuencias de PostgreSQL no avanzan: dejarlas tras el máximo
+def ajustar_secuencias(conn):
+    if conn.dialect.name != "postgresql":
+        return
+    for tabla in Base.metadata.sorted_tables:
+        pk = tabla.autoincrement_column
+        if pk is None:  # ventas_rollup: clave compuesta, sin secuencia
+            continue
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{tabla.name}', '{pk.name}'), "
+            f"COALESCE((SELECT MAX({pk.name}) FROM {tabla.name}), 0) + 1, false)"
+        ))
+
+def seed(engine=default_engine, productos: int = 500, mesas: int = 50, empleados: int = 20,
+         pedidos: int = 1_000_000, dias: int = 365, bloque: int = 20_000, semilla: int = 42,
+         reset: bool = False, log=print) -> dict:
+    rng = random.Random(semilla)
+    preparar_tablas(engine, reset)
+    started = time.perf_counter()
+    contrasena_hash = get_password_hash(SEED_PASSWORD)  # bcrypt una sola vez
+    precios = {n: round(rng.uniform(1.5, 40.0), 2) for n in range(1, productos + 1)}
+
+    with engine.begin() as conn:
+        conn.execute(insert(models.Usuario), [
+            {"id_usuario": 1, "nombre_completo": "Admin", "email": ADMIN_EMAIL,
+             "contrasena_hash": contrasena_hash, "rol": "admin", "activo": True},
+            *({"id_usuario": n + 2, "nombre_completo": f"Empleado {n}", "email": empleado_email(n),
+               "contrasena_hash": contrasena_hash, "rol": "empleado", "activo": True} for n in range(empleados)),
+        ])
+        conn.execute(insert(models.Producto), [
+            {"id_producto": n, "nombre": f"Producto {n}", "precio": precio,
+             "categoria": CATEGORIAS[n % len(CATEGORIAS)], "activo": True}
+            for n, precio in precios.items()
+        ])
+        if mesas:
+            conn.execute(insert(models.Mesa), [{"id_mesa": n, "numero_mesa": n, "estado": "libre"}
+                                               for n in range(1, mesas + 1)])
+
+    writer_class = CopyWriter if usa_copy(engine) else InsertWriter
+    filas = generar_pedidos(pedidos, precios, mesas, list(range(2, empleados + 2)), rng, dias, abiertos=mesas // 2)
+    mesas_ocupadas, insertados = [], 0
+    while True:
+        lote = list(islice(filas, bloque))
+        if not lote:
+            break
+        # Una transacción por bloque: memoria acotada y progreso visible
+        with engine.begin() as conn:
+            if engine.dialect.name == "postgresql":
+                conn.execute(text("SET LOCAL synchronous_commit = off"))
+            writer = writer_class(conn)
+            writer.write("pedidos", [pedido for pedido, _, _ in lote])
+            writer.write("detalle_pedido", [d for _, detalles, _ in lote for d in detalles])
+            pagos = [p for _, _, pagos in lote for p in pagos]
+            if pagos:
+                writer.write("pagos", pagos)
+        mesas_ocupadas += [pedido[2] for pedido, _, _ in lote if pedido[5] == "abierto"]
+        insertados += len(lote)
+        log(f"{insertados} pedidos ({insertados / (time.perf_counter() - started):.0f}/s)")
+
+    with engine.begin() as conn:
+        if mesas_ocupadas:
+            conn.execute(update(models.Mesa).where(models.Mesa.id_mesa.in_(mesas_ocupadas)).values(estado="ocupada"))
+        ajustar_secuencias(conn)
+        # Rollups de ventas de todo el historial generado (un día de margen por la zona horaria)
+        hoy = datetime.now(timezone.utc).date()
+        for sentencia in rollup.sentencias_reconstruccion(engine.dialect.name, hoy - timedelta(days=dias + 1),
+                                                          hoy + timedelta(days=2)):
+            conn.execute(sentencia)
+        conteos = {tabla.name: conn.scalar(select(func.count()).select_from(tabla))
+                   for tabla in Base.metadata.sorted_tables}
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("ANALYZE"))
+    conteos["seconds"] = round(time.perf_counter() - started, 1)
+    return conteos
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reset", action="store_true", help="vaciar las tablas antes de generar")
+    parser.add_argument("--productos", type=int, default=500)
+    parser.add_argument("--mesas", type=int, default=50)
+    parser.add_argument("--empleados", type=int, default=20)
+    parser.add_argument("--pedidos", type=int, default=1_000_000)
+    parser.add_argument("--dias", type=int, default=365, help="días de historial hasta hoy")
+    parser.add_argument("--bloque", type=int, default=20_000, help="pedidos por transacción")
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+    conteos = seed(productos=args.productos, mesas=args.mesas, empleados=args.empleados, pedidos=args.pedidos,
+                   dias=args.dias, bloque=args.bloque, semilla=args.semilla, reset=args.reset,
+                   log=lambda msg: print(msg, file=sys.stderr))
+    print(json.dumps(conteos, indent=2))
+
+if __name__ == "__main__":
+    main()